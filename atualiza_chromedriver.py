@@ -22,20 +22,24 @@ Dependências (instalar com 'pip install'):
 """
 
 import os
+import sys
+import re
+import io
+import json
+import codecs
 import requests
 import subprocess
 import hashlib
-import colorama
-from contextlib import contextmanager
+import shutil
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
 from datetime import datetime
 from dotenv import load_dotenv
-from plyer import notification
-from typing import Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Tuple, Union
 
 # === INICIALIZAÇÃO DE ESTILOS ===
-# Inicializa colorama para funcionar no Windows e reseta a cor após cada print
-colorama.init(autoreset=True)
-
 class Style:
     """Contém os códigos de escape ANSI para estilizar o texto do terminal."""
     RESET = '\033[0m'
@@ -46,20 +50,100 @@ class Style:
     BLUE = '\033[94m'
     CYAN = '\033[96m'
 
+
+def inicializar_estilos() -> None:
+    """
+    Prepara a saída colorida: o colorama só é carregado quando a saída é um terminal.
+
+    Em execuções agendadas ou redirecionadas para arquivo os códigos ANSI são
+    desativados, e o colorama (junto com o custo da sua importação) é dispensado.
+    """
+    if sys.stdout.isatty():
+        # Inicializa colorama para funcionar no Windows e reseta a cor após cada print
+        import colorama
+        colorama.init(autoreset=True)
+    else:
+        for nome in ('RESET', 'BOLD', 'RED', 'GREEN', 'YELLOW', 'BLUE', 'CYAN'):
+            setattr(Style, nome, '')
+
 # === CONFIGURAÇÃO ===
 load_dotenv()
 CHROMEDRIVER_PATH = os.getenv('CHROMEDRIVER_PATH')
-ZIP_NAME = 'chromedriver-win64.zip'
+ZIP_NAME_TEMPLATE = 'chromedriver-{plataforma}.zip'
+CANAIS = tuple(c.strip() for c in os.getenv('CHROMEDRIVER_CANAIS', 'Stable').split(',') if c.strip())
+PLATAFORMAS = tuple(p.strip() for p in os.getenv('CHROMEDRIVER_PLATAFORMAS', 'win64').split(',') if p.strip())
 VERSION_FILE = 'version.txt'
+CACHE_FILE = 'versions-cache.json'
+CACHE_FILE_ANTIGO = '.versions-cache.json'
+ESTADO_DIR = '.autodriver'
+ARTEFATOS_PATH = os.getenv('ARTEFATOS_PATH')
+EXTRAIDOS_PATH = os.getenv('EXTRAIDOS_PATH')
+EXTRAIDOS_LIMITE_MB = float(os.getenv('EXTRAIDOS_LIMITE_MB', '1024'))
+PATCHES_FORMATO = os.getenv('PATCHES_FORMATO', 'zstd').strip().lower()  # 'zstd', 'bsdiff' ou 'nenhum'
+# Um valor inválido desativa os patches (com aviso em main) em vez de interromper o ciclo.
+PATCHES_FORMATO_INVALIDO = None if PATCHES_FORMATO in ('zstd', 'bsdiff', 'nenhum') else PATCHES_FORMATO
+if PATCHES_FORMATO_INVALIDO:
+    PATCHES_FORMATO = 'nenhum'
+MANIFESTO_FILE = 'manifest.json'
+PUSH_RESULTADO_FILE = 'push-resultado.json'
+PUSH_PENDENTE_FILE = 'push-pendente.json'
+ARMAZENAMENTO = os.getenv('CHROMEDRIVER_ARMAZENAMENTO', 'git')  # 'git', 'lfs' ou 'release'
+RELEASE_ASSETS_PATH = os.getenv('RELEASE_ASSETS_PATH')
+RELEASE_ASSETS_URL = os.getenv('RELEASE_ASSETS_URL')
+RELEASE_MANIFESTO_FILE = 'artefatos.json'
+HEARTBEAT_FILE = 'heartbeat.json'
+BACKFILL_CHECKPOINT_FILE = 'backfill.json'
+CATALOGO_FILE = 'catalogo.sqlite3'
+BUILDS_CACHE_FILE = 'builds-cache.json'
+BUILDS_CACHE_TTL = float(os.getenv('BUILDS_CACHE_TTL', '21600'))  # segundos
+BACKFILL_LOTE = int(os.getenv('BACKFILL_LOTE', '50'))  # versões por commit/push
+PROGRESSO_FILE = 'progresso.json'
+VERSOES_ESPELHO_FILE = 'last-known-good-versions-with-downloads.json'
+SERVE_HOST = os.getenv('SERVE_HOST', '127.0.0.1')
+SERVE_PORTA = int(os.getenv('SERVE_PORTA', '8080'))
+DAEMON_INTERVALO = float(os.getenv('DAEMON_INTERVALO', '3600'))  # segundos
+DAEMON_JITTER = float(os.getenv('DAEMON_JITTER', '300'))  # segundos
+LFS_PADRAO = 'chromedriver-*.zip'
 JSON_URL = 'https://googlechromelabs.github.io/chrome-for-testing/last-known-good-versions-with-downloads.json'
+KNOWN_GOOD_URL = 'https://googlechromelabs.github.io/chrome-for-testing/known-good-versions-with-downloads.json'
+BUILDS_URL = 'https://googlechromelabs.github.io/chrome-for-testing/latest-patch-versions-per-build-with-downloads.json'
 CHUNK_SIZE = 1024 * 1024  # 1MB
+HASH_BUFFER_SIZE = 1024 * 1024  # 1MB
+JSON_CHUNK_SIZE = 64 * 1024  # 64KB, blocos lidos pela leitura incremental de JSON
+JSON_LEITOR = os.getenv('JSON_LEITOR', 'nativo')  # 'nativo' ou 'ijson'
+HASH_ALGORITMOS = tuple(a.strip() for a in os.getenv('HASH_ALGORITMOS', 'sha256').split(',') if a.strip())
+DOWNLOAD_TENTATIVAS = int(os.getenv('DOWNLOAD_TENTATIVAS', '5'))
+DOWNLOAD_SEGMENTOS = int(os.getenv('DOWNLOAD_SEGMENTOS', '1'))
+DOWNLOAD_PARALELISMO = int(os.getenv('DOWNLOAD_PARALELISMO', '3'))
+GIT_BACKEND = os.getenv('GIT_BACKEND', 'subprocess')  # 'subprocess' ou 'dulwich'
+GIT_PUSH_TENTATIVAS = int(os.getenv('GIT_PUSH_TENTATIVAS', '4'))
+GIT_VERIFICAR_TAG_REMOTA = os.getenv('GIT_VERIFICAR_TAG_REMOTA', '').lower() in ('1', 'true', 'sim')
+METRICAS_JSONL = os.getenv('METRICAS_JSONL')  # arquivo de saída (uma linha JSON por fase)
+METRICAS_PROMETHEUS = os.getenv('METRICAS_PROMETHEUS')  # textfile do node_exporter (.prom)
+PROGRESSO_HZ = float(os.getenv('PROGRESSO_HZ', '10'))  # redesenhos por segundo da barra no terminal
+PROGRESSO_INTERVALO_TEXTO = float(os.getenv('PROGRESSO_INTERVALO_TEXTO', '10'))  # segundos entre linhas fora de terminais
 
 
 # === FUNÇÕES UTILITÁRIAS ===
 def log(msg: str, style: str = "") -> None:
     """Imprime uma mensagem de log com timestamp e estilo opcional."""
     timestamp = f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}]"
-    print(f"{timestamp} {style}{msg}") # O autoreset do colorama cuida do Style.RESET
+    # Uma única escrita por linha, para que logs de threads simultâneas não se misturem.
+    print(f"{timestamp} {style}{msg}\n", end='') # O autoreset do colorama cuida do Style.RESET (fora de terminais não há estilos)
+
+_sessao: Optional[requests.Session] = None
+
+
+def obter_sessao() -> requests.Session:
+    """Retorna a sessão HTTP compartilhada (keep-alive), criando-a na primeira chamada."""
+    global _sessao
+    if _sessao is None:
+        _sessao = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=max(10, DOWNLOAD_SEGMENTOS))
+        _sessao.mount('https://', adapter)
+        _sessao.mount('http://', adapter)
+    return _sessao
+
 
 @contextmanager
 def change_dir(path: str):
@@ -72,158 +156,2994 @@ def change_dir(path: str):
         os.chdir(original_path)
 
 
+def ler_json(path: str) -> dict:
+    """Lê um arquivo JSON de estado, retornando um dicionário vazio se ausente ou inválido."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def salvar_json(path: str, dados: dict) -> None:
+    """Grava um arquivo JSON de forma atômica (arquivo temporário + rename)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, indent=2)
+    os.replace(tmp_path, path)
+
+
 def calcular_sha256(caminho_arquivo: str) -> str:
-    """Calcula o hash SHA256 de um arquivo."""
-    sha256 = hashlib.sha256()
-    with open(caminho_arquivo, 'rb') as f:
-        for chunk in iter(lambda: f.read(8192), b''):
-            sha256.update(chunk)
-    return sha256.hexdigest()
+    """
+    Calcula o hash SHA256 de um arquivo que já está em disco.
 
+    Para arquivos recém-baixados prefira os digests retornados por
+    `baixar_arquivo_com_progresso`, que são calculados durante a transferência.
+    """
+    with medir('hash', arquivo=os.path.basename(caminho_arquivo), bytes=os.path.getsize(caminho_arquivo)):
+        with open(caminho_arquivo, 'rb') as f:
+            if hasattr(hashlib, 'file_digest'):
+                return hashlib.file_digest(f, 'sha256').hexdigest()
+            sha256 = hashlib.sha256()
+            _atualizar_hashes(f, [sha256])
+        return sha256.hexdigest()
 
-# === FLUXO PRINCIPAL ===
-def obter_ultima_versao_e_url() -> Tuple[str, str]:
-    """Obtém a versão e a URL de download do último ChromeDriver estável."""
-    log("Consultando o API de versões do ChromeDriver...", style=Style.CYAN)
-    response = requests.get(JSON_URL, timeout=15)
-    response.raise_for_status()
-    data = response.json()
-    
-    stable_channel = data["channels"]["Stable"]
-    version = stable_channel["version"]
-    downloads = stable_channel["downloads"]["chromedriver"]
-    
-    win64_download = next((item for item in downloads if item["platform"] == "win64"), None)
-    
-    if not win64_download:
-        raise ValueError("URL do chromedriver-win64.zip não encontrada no JSON!")
-        
-    return version, win64_download["url"]
 
+def _atualizar_hashes(f, hashers: Sequence, limite: Optional[int] = None) -> None:
+    """Alimenta os `hashers` com o conteúdo de `f` (até `limite` bytes), em blocos de HASH_BUFFER_SIZE."""
+    buffer = bytearray(HASH_BUFFER_SIZE)
+    view = memoryview(buffer)
+    restante = limite
+    while restante is None or restante > 0:
+        lidos = f.readinto(view if restante is None else view[:min(restante, HASH_BUFFER_SIZE)])
+        if not lidos:
+            break
+        for h in hashers:
+            h.update(view[:lidos])
+        if restante is not None:
+            restante -= lidos
 
-def ler_versao_salva(path: str) -> Optional[str]:
-    """Lê a versão salva localmente do arquivo de texto."""
-    if os.path.exists(path):
-        with open(path, 'r', encoding='utf-8') as f:
-            return f.read().strip()
-    return None
 
+def _extrair_canais(data: dict) -> dict:
+    """Reduz o JSON da API a {canal: {"version": ..., "chromedriver": {plataforma: url}}}."""
+    canais = {}
+    for nome, canal in data["channels"].items():
+        downloads = canal.get("downloads", {}).get("chromedriver", [])
+        canais[nome] = {
+            "version": canal["version"],
+            "chromedriver": {item["platform"]: item["url"] for item in downloads},
+        }
+    return canais
 
-def salvar_versao(path: str, version: str) -> None:
-    """Salva a string da versão em um arquivo de texto."""
-    with open(path, 'w', encoding='utf-8') as f:
-        f.write(version)
 
+def nome_zip(plataforma: str) -> str:
+    """Nome do arquivo .zip do ChromeDriver para uma plataforma (ex.: 'chromedriver-linux64.zip')."""
+    return ZIP_NAME_TEMPLATE.format(plataforma=plataforma)
 
-def baixar_arquivo_com_progresso(url: str, path: str) -> None:
-    """Baixa um arquivo exibindo uma barra de progresso."""
-    response = requests.get(url, stream=True, timeout=60)
-    response.raise_for_status()
-    total_size = int(response.headers.get('Content-Length', 0))
-    downloaded_size = 0
 
-    with open(path, 'wb') as f:
-        print() # Adiciona uma linha em branco para a barra de progresso
-        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
-            if chunk:
-                f.write(chunk)
-                downloaded_size += len(chunk)
-                percent = (downloaded_size / total_size) * 100 if total_size > 0 else 0
-                progress_bar = f"\r{Style.BLUE}Baixando: {percent:.2f}% ({downloaded_size / (1024*1024):.2f}MB / {total_size / (1024*1024):.2f}MB)"
-                print(progress_bar, end='', flush=True)
-    print() # Garante que o próximo log comece em uma nova linha
-    log("Download concluído.", style=Style.GREEN)
+def diretorio_canal(canal: str) -> str:
+    """Subpasta (relativa ao repositório) dos arquivos de um canal. O Stable fica na raiz."""
+    return '' if canal == 'Stable' else canal.lower()
 
 
-def git_push_com_tag(repo_path: str, files_to_add: list, tag: str, message: str) -> None:
-    """Verifica alterações, faz commit, cria e envia uma tag para o repositório Git."""
+def tag_canal(canal: str, versao: str) -> str:
+    """Nome da tag Git de uma versão em um canal (ex.: 'v126.0.6478.126' ou 'beta-v127.0.6533.5')."""
+    tag = f'v{versao}'
+    return tag if canal == 'Stable' else f'{canal.lower()}-{tag}'
+
+
+def salvar_hash(caminho_arquivo: str, sha256: str) -> str:
+    """Grava `<arquivo>.sha256` no formato do `sha256sum` e retorna o caminho gravado."""
+    caminho_hash = f"{caminho_arquivo}.sha256"
+    with open(caminho_hash, 'w', encoding='utf-8') as f:
+        f.write(f"{sha256}  {os.path.basename(caminho_arquivo)}\n")
+    return caminho_hash
+
+
+def ler_hash_salvo(caminho_arquivo: str) -> Optional[str]:
+    """
+    SHA-256 do `<arquivo>.sha256`, se ele for confiável para a versão atual do arquivo.
+
+    O `.sha256` só vale se foi gravado depois da última modificação do arquivo
+    (mtime igual ou mais novo); um `.sha256` antigo, ou em outro formato, é ignorado.
+    """
+    caminho_hash = f"{caminho_arquivo}.sha256"
     try:
-        with change_dir(repo_path):
-            status_result = subprocess.run(['git', 'status', '--porcelain'] + files_to_add, capture_output=True, text=True, check=True)
-            if not status_result.stdout.strip():
-                log("Nenhuma alteração detectada nos arquivos. Pulando commit.", style=Style.YELLOW)
-            else:
-                log("Alterações detectadas. Enviando para o repositório...", style=Style.CYAN)
-                subprocess.run(['git', 'add'] + files_to_add, check=True)
-                subprocess.run(['git', 'commit', '-m', message], check=True)
-                subprocess.run(['git', 'push'], check=True)
-                log("Commit enviado com sucesso.", style=Style.GREEN)
+        if os.stat(caminho_hash).st_mtime_ns < os.stat(caminho_arquivo).st_mtime_ns:
+            return None
+        with open(caminho_hash, 'r', encoding='utf-8') as f:
+            sha256 = (f.read().split() or [''])[0].lower()
+    except OSError:
+        return None
+    return sha256 if re.fullmatch(r'[0-9a-f]{64}', sha256) else None
 
-            tags_result = subprocess.run(['git', 'tag'], capture_output=True, text=True, check=True)
-            if tag in tags_result.stdout.splitlines():
-                log(f"A tag '{Style.BOLD}{tag}{Style.RESET}{Style.YELLOW}' já existe. Não será criada novamente.", style=Style.YELLOW)
-            else:
-                log(f"Criando e enviando a tag '{Style.BOLD}{tag}{Style.RESET}{Style.CYAN}'...", style=Style.CYAN)
-                subprocess.run(['git', 'tag', tag], check=True)
-                subprocess.run(['git', 'push', 'origin', tag], check=True)
-                log(f"Tag '{Style.BOLD}{tag}{Style.RESET}{Style.GREEN}' criada e enviada com sucesso.", style=Style.GREEN)
 
-    except FileNotFoundError:
-        log("ERRO: O 'git' não foi encontrado. Verifique se ele está instalado e no PATH do sistema.", style=Style.RED)
-    except subprocess.CalledProcessError as e:
-        log(f"ERRO ao executar comandos Git: {e}", style=Style.RED)
-        log(f"Stderr: {e.stderr}", style=Style.RED)
+# === LEITURA INCREMENTAL DE JSON ===
+# O histórico de versões tem vários MB; carregá-lo com `response.json()` cria
+# centenas de milhares de objetos de uma vez. Aqui os itens de um array (ou os
+# membros de um objeto) são lidos um a um do fluxo de bytes, e a memória usada fica limitada ao maior item mais um
+# bloco, independentemente do tamanho do documento. Com JSON_LEITOR=ijson, a
+# leitura é feita pelo pacote opcional `ijson` (nos benchmarks, o leitor nativo
+# baseado em `raw_decode` foi mais rápido com o mesmo pico de memória).
+_decodificador_json = json.JSONDecoder()
+_FIM_DE_NUMERO = frozenset(' \t\r\n,]}')
 
 
-def notificar(titulo: str, mensagem: str) -> None:
-    """Envia uma notificação para o desktop."""
+class _LeitorJson:
+    """Lê valores JSON consecutivos de um iterável de blocos de bytes, descartando o que já foi lido."""
+
+    def __init__(self, blocos: Iterable[bytes]):
+        self._blocos = iter(blocos)
+        self._decodificador = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._posicao = 0
+        self._fim = False
+
+    def _ler_bloco(self) -> bool:
+        """Acrescenta o próximo bloco ao buffer. Retorna False quando o fluxo terminou."""
+        bloco = next(self._blocos, None)
+        if bloco is None:
+            self._fim = True
+        texto = self._decodificador.decode(bloco or b'', final=self._fim)
+        self._buffer = self._buffer[self._posicao:] + texto
+        self._posicao = 0
+        return not self._fim
+
+    def proximo_caractere(self) -> str:
+        """Pula espaços em branco e retorna o próximo caractere, sem consumi-lo."""
+        while True:
+            while self._posicao < len(self._buffer) and self._buffer[self._posicao] in ' \t\r\n':
+                self._posicao += 1
+            if self._posicao < len(self._buffer):
+                return self._buffer[self._posicao]
+            if not self._ler_bloco():
+                raise ValueError("O JSON terminou de forma inesperada.")
+
+    def consumir(self, esperado: str) -> None:
+        caractere = self.proximo_caractere()
+        if caractere != esperado:
+            raise ValueError(f"JSON inválido: esperado '{esperado}', encontrado '{caractere}'.")
+        self._posicao += 1
+
+    def valor(self) -> Any:
+        """Decodifica o próximo valor completo, lendo mais blocos enquanto ele estiver incompleto."""
+        self.proximo_caractere()
+        while True:
+            try:
+                valor, fim = _decodificador_json.raw_decode(self._buffer, self._posicao)
+                # Um número só está completo quando vem seguido de um delimitador: cortado
+                # pelo fim do bloco (ex.: "12." + "5"), ele continua no próximo.
+                numero = isinstance(valor, (int, float)) and not isinstance(valor, bool)
+                if self._fim or not numero or (fim < len(self._buffer) and self._buffer[fim] in _FIM_DE_NUMERO):
+                    self._posicao = fim
+                    return valor
+            except json.JSONDecodeError:
+                if self._fim:
+                    raise
+            self._ler_bloco()
+
+    def ate_chave(self, chave: str) -> bool:
+        """Avança até o valor de `chave` no objeto de primeiro nível, descartando os campos anteriores."""
+        self.consumir('{')
+        if self.proximo_caractere() == '}':
+            return False
+        while True:
+            nome = self.valor()
+            self.consumir(':')
+            if nome == chave:
+                return True
+            self.valor()
+            if self.proximo_caractere() == '}':
+                return False
+            self.consumir(',')
+
+
+def _importar_ijson():
     try:
-        notification.notify(title=titulo, message=mensagem, timeout=10)
-    except Exception as e:
-        log(f"Falha ao enviar notificação: {e}", style=Style.YELLOW)
+        import ijson
+    except ImportError:
+        return None
+    return ijson
 
 
-def main():
-    """Função principal de orquestração do script."""
-    if not CHROMEDRIVER_PATH:
-        log("ERRO: A variável de ambiente 'CHROMEDRIVER_PATH' não está definida.", style=Style.RED)
-        log("Por favor, crie um arquivo .env e adicione a linha: CHROMEDRIVER_PATH=/caminho/para/seu/repositorio", style=Style.YELLOW)
+def _iterar_com_ijson(blocos: Iterable[bytes], fabrica, prefixo: str):
+    """Alimenta um leitor push do ijson (`items_coro`/`kvitems_coro`) e gera os resultados, ou None sem o ijson."""
+    ijson = _importar_ijson() if JSON_LEITOR == 'ijson' else None
+    if JSON_LEITOR == 'ijson' and ijson is None:
+        log("O pacote 'ijson' não está instalado. Usando o leitor de JSON nativo.", style=Style.YELLOW)
+    if ijson is None:
+        return None
+
+    def gerar():
+        resultados = ijson.sendable_list()
+        leitor = getattr(ijson, fabrica)(resultados, prefixo, use_float=True)
+        for bloco in blocos:
+            leitor.send(bloco)
+            yield from resultados
+            del resultados[:]
+        leitor.close()
+        yield from resultados
+    return gerar()
+
+
+def iterar_itens_json(blocos: Iterable[bytes], chave: str) -> Iterator[Any]:
+    """
+    Gera, um a um, os itens do array `chave` do objeto JSON lido de `blocos`.
+
+    Os demais campos do objeto de primeiro nível são decodificados e descartados;
+    o documento inteiro nunca fica na memória.
+    """
+    via_ijson = _iterar_com_ijson(blocos, 'items_coro', f'{chave}.item')
+    if via_ijson is not None:
+        yield from via_ijson
         return
 
-    os.makedirs(CHROMEDRIVER_PATH, exist_ok=True)
-    caminho_zip = os.path.join(CHROMEDRIVER_PATH, ZIP_NAME)
-    caminho_version = os.path.join(CHROMEDRIVER_PATH, VERSION_FILE)
+    leitor = _LeitorJson(blocos)
+    if not leitor.ate_chave(chave):
+        return
+    leitor.consumir('[')
+    if leitor.proximo_caractere() == ']':
+        return
+    while True:
+        yield leitor.valor()
+        if leitor.proximo_caractere() == ']':
+            return
+        leitor.consumir(',')
 
-    try:
-        log("Iniciando verificação de versão do ChromeDriver...", style=Style.BLUE)
-        versao_recente, url_chromedriver = obter_ultima_versao_e_url()
-        log(f"Última versão estável encontrada: {Style.BOLD}{versao_recente}", style=Style.GREEN)
 
-        versao_salva = ler_versao_salva(caminho_version)
-        log(f"Versão salva localmente: {Style.BOLD}{versao_salva or 'Nenhuma'}", style=Style.CYAN)
+def iterar_pares_json(blocos: Iterable[bytes], chave: str) -> Iterator[Tuple[str, Any]]:
+    """Como `iterar_itens_json`, mas para um objeto: gera os pares (nome, valor) de `chave`, um a um."""
+    via_ijson = _iterar_com_ijson(blocos, 'kvitems_coro', chave)
+    if via_ijson is not None:
+        yield from via_ijson
+        return
 
-        if versao_salva == versao_recente:
-            log("Você já possui a última versão. Nenhuma ação necessária.", style=Style.YELLOW)
+    leitor = _LeitorJson(blocos)
+    if not leitor.ate_chave(chave):
+        return
+    leitor.consumir('{')
+    if leitor.proximo_caractere() == '}':
+        return
+    while True:
+        nome = leitor.valor()
+        leitor.consumir(':')
+        yield nome, leitor.valor()
+        if leitor.proximo_caractere() == '}':
             return
+        leitor.consumir(',')
 
-        log(f"Nova versão detectada. Iniciando download...", style=Style.BLUE)
-        baixar_arquivo_com_progresso(url_chromedriver, caminho_zip)
 
-        sha256 = calcular_sha256(caminho_zip)
-        log(f"SHA256 do arquivo baixado: {Style.BOLD}{sha256}", style=Style.CYAN)
+# === INSTRUMENTAÇÃO ===
+# Cada fase medida gera um registro com tempo monotônico, bytes, novas tentativas
+# e resultado. Os registros vão para METRICAS_JSONL (uma linha JSON por fase) e,
+# ao fim de cada ciclo, são agregados no textfile do Prometheus (METRICAS_PROMETHEUS).
+_medicao_atual: ContextVar[Optional[dict]] = ContextVar('medicao_atual', default=None)
+_metricas_lock = threading.Lock()
+_metricas_ciclo: Optional[list] = None
 
-        salvar_versao(caminho_version, versao_recente)
-        log(f"Arquivo de versão atualizado para '{Style.BOLD}{versao_recente}{Style.RESET}{Style.CYAN}'.", style=Style.CYAN)
 
-        tag = f'v{versao_recente}'
-        commit_message = f"Atualiza ChromeDriver para a versão {versao_recente}"
-        
-        git_push_com_tag(
-            repo_path=CHROMEDRIVER_PATH,
-            files_to_add=[ZIP_NAME, VERSION_FILE],
-            tag=tag,
-            message=commit_message
-        )
+def _emitir_metrica(registro: dict) -> None:
+    with _metricas_lock:
+        if _metricas_ciclo is not None:
+            _metricas_ciclo.append(registro)
+        if METRICAS_JSONL:
+            with open(METRICAS_JSONL, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(registro, ensure_ascii=False) + '\n')
 
-        notificar("ChromeDriver Atualizado", f"Versão {versao_recente} baixada e enviada para o GitHub.")
-        log("Processo concluído com sucesso!", style=Style.BOLD + Style.GREEN)
 
-    except requests.exceptions.RequestException as e:
-        log(f"ERRO DE REDE: Não foi possível conectar à URL de download. Detalhes: {e}", style=Style.RED)
-    except (ValueError, KeyError) as e:
-        log(f"ERRO DE PROCESSAMENTO DE DADOS: Não foi possível processar os dados do JSON. Detalhes: {e}", style=Style.RED)
+@contextmanager
+def medir(fase: str, **atributos):
+    """
+    Mede a duração de `fase` e emite o registro ao final, com 'resultado' ok/erro.
+
+    O dicionário devolvido pode receber campos durante a fase (bytes,
+    novas_tentativas, ...); funções chamadas dentro dela usam `anotar_metrica`.
+    """
+    registro = {"ts": datetime.now().isoformat(timespec='milliseconds'), "fase": fase, **atributos}
+    token = _medicao_atual.set(registro)
+    inicio = time.monotonic()
+    try:
+        yield registro
     except Exception as e:
-        log(f"Ocorreu um erro inesperado: {e}", style=Style.RED)
+        registro["resultado"] = "erro"
+        registro["erro"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        registro["duracao_s"] = round(time.monotonic() - inicio, 6)
+        registro.setdefault("resultado", "ok")
+        _medicao_atual.reset(token)
+        _emitir_metrica(registro)
+
+
+def anotar_metrica(**campos) -> None:
+    """Acrescenta `campos` à medição ativa mais interna (sem efeito fora de `medir`)."""
+    registro = _medicao_atual.get()
+    if registro is not None:
+        registro.update(campos)
+
+
+def escrever_metricas_prometheus(caminho: str, registros: Sequence[dict], resultado: str) -> None:
+    """
+    Grava as métricas do último ciclo no formato textfile do node_exporter.
+
+    Os registros são somados por fase. O arquivo é escrito em um temporário e
+    renomeado, para que o node_exporter nunca leia um arquivo pela metade.
+    """
+    agregados = {}
+    for registro in registros:
+        fase = agregados.setdefault(registro["fase"], {"duracao_s": 0.0, "bytes": 0, "novas_tentativas": 0,
+                                                       "execucoes": 0, "erros": 0})
+        fase["duracao_s"] += registro["duracao_s"]
+        fase["bytes"] += registro.get("bytes", 0)
+        fase["novas_tentativas"] += registro.get("novas_tentativas", 0)
+        fase["execucoes"] += 1
+        fase["erros"] += registro["resultado"] == "erro"
+
+    linhas = []
+    for campo, nome, ajuda in (
+        ("duracao_s", "autodriver_fase_duracao_segundos", "Tempo gasto em cada fase no último ciclo."),
+        ("bytes", "autodriver_fase_bytes", "Bytes processados em cada fase no último ciclo."),
+        ("novas_tentativas", "autodriver_fase_novas_tentativas", "Novas tentativas em cada fase no último ciclo."),
+        ("execucoes", "autodriver_fase_execucoes", "Quantas vezes cada fase rodou no último ciclo."),
+        ("erros", "autodriver_fase_erros", "Execuções com erro de cada fase no último ciclo."),
+    ):
+        linhas += [f"# HELP {nome} {ajuda}", f"# TYPE {nome} gauge"]
+        linhas += [f'{nome}{{fase="{fase}"}} {valores[campo]:g}' for fase, valores in sorted(agregados.items())]
+    linhas += ["# HELP autodriver_ultimo_ciclo_resultado Resultado do último ciclo (1 no resultado obtido).",
+               "# TYPE autodriver_ultimo_ciclo_resultado gauge"]
+    linhas += [f'autodriver_ultimo_ciclo_resultado{{resultado="{opcao}"}} {int(opcao == resultado)}'
+               for opcao in ('atualizado', 'sem-alteracao', 'erro')]
+    linhas += ["# HELP autodriver_ultimo_ciclo_timestamp_segundos Horário (Unix) do fim do último ciclo.",
+               "# TYPE autodriver_ultimo_ciclo_timestamp_segundos gauge",
+               f"autodriver_ultimo_ciclo_timestamp_segundos {time.time():.0f}"]
+
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(linhas) + '\n')
+    os.replace(temporario, caminho)
+
+
+# === PROGRESSO ===
+# O download só avisa `Progresso.avancar(n)` a cada bloco; o reporter escolhido
+# decide como (e com que frequência) mostrar o andamento. Assim o custo por
+# bloco é uma soma e uma leitura de relógio, não uma linha formatada no console.
+def _formatar_duracao(segundos: float) -> str:
+    minutos, segundos = divmod(int(segundos), 60)
+    horas, minutos = divmod(minutos, 60)
+    return f"{horas}:{minutos:02d}:{segundos:02d}" if horas else f"{minutos}:{segundos:02d}"
+
+
+class ReporterTerminal:
+    """Barra de progresso redesenhada na mesma linha, no máximo PROGRESSO_HZ vezes por segundo."""
+
+    def __init__(self):
+        self.intervalo = 1 / max(PROGRESSO_HZ, 0.1)
+
+    def exibir(self, estado: dict) -> None:
+        print(f"\r{Style.BLUE}{self._linha(estado)}", end='', flush=True)
+
+    def finalizar(self, estado: dict) -> None:
+        print(f"\r{Style.BLUE}{self._linha(estado)}", flush=True)
+
+    @staticmethod
+    def _linha(estado: dict) -> str:
+        linha = f"Baixando {estado['descricao']}: "
+        if estado["total"]:
+            linha += f"{estado['percentual']:.2f}% ({estado['baixados'] / (1024*1024):.2f}MB / {estado['total'] / (1024*1024):.2f}MB)"
+        else:
+            linha += f"{estado['baixados'] / (1024*1024):.2f}MB"
+        linha += f" {estado['velocidade'] / (1024*1024):.2f}MB/s"
+        if estado["eta_s"] is not None:
+            linha += f" ETA {_formatar_duracao(estado['eta_s'])}"
+        return linha + "   "
+
+
+class ReporterTexto(ReporterTerminal):
+    """Linhas de log simples a cada PROGRESSO_INTERVALO_TEXTO segundos (saída redirecionada ou downloads simultâneos)."""
+
+    def __init__(self):
+        self.intervalo = PROGRESSO_INTERVALO_TEXTO
+
+    def exibir(self, estado: dict) -> None:
+        log(self._linha(estado).rstrip())
+
+    def finalizar(self, estado: dict) -> None:
+        pass  # A conclusão de cada download já é registrada no log.
+
+
+_progressos_publicados: Dict[str, dict] = {}
+
+
+class ReporterMetricas:
+    """
+    Publica o andamento em `.autodriver/progresso.json` em vez de escrever no terminal.
+
+    Usado pelo modo daemon; o subcomando `serve` expõe o arquivo em `/progresso.json`.
+    """
+
+    def __init__(self):
+        self.intervalo = 1.0
+
+    def exibir(self, estado: dict) -> None:
+        with _metricas_lock:
+            _progressos_publicados[estado["descricao"]] = estado
+            self._publicar()
+
+    def finalizar(self, estado: dict) -> None:
+        with _metricas_lock:
+            _progressos_publicados.pop(estado["descricao"], None)
+            self._publicar()
+
+    @staticmethod
+    def _publicar() -> None:
+        salvar_json(os.path.join(diretorio_estado(), PROGRESSO_FILE), {
+            "atualizado_em": datetime.now().isoformat(timespec='seconds'),
+            "downloads": list(_progressos_publicados.values()),
+        })
+
+
+_fabrica_reporter = None
+
+
+def definir_reporter_progresso(fabrica) -> None:
+    """Define a classe (ou fábrica) de reporter usada por todos os downloads; None volta ao padrão."""
+    global _fabrica_reporter
+    _fabrica_reporter = fabrica
+
+
+def _criar_reporter(exclusivo: bool):
+    if _fabrica_reporter is not None:
+        return _fabrica_reporter()
+    if exclusivo and sys.stdout.isatty():
+        return ReporterTerminal()
+    return ReporterTexto()
+
+
+def _nome_transferencia(destino: str) -> str:
+    nome = os.path.basename(destino)
+    return nome[:-len('.part')] if nome.endswith('.part') else nome
+
+
+class Progresso:
+    """
+    Acompanha os bytes de uma transferência e repassa o estado ao reporter com frequência limitada.
+
+    `exclusivo` indica que este é o único download em andamento, caso em que a
+    barra no terminal pode ser usada. Seguro para uso por várias threads.
+    """
+
+    def __init__(self, descricao: str, total: int, inicial: int = 0, exclusivo: bool = True):
+        self.descricao = descricao
+        self.total = total
+        self.inicial = inicial
+        self.baixados = inicial
+        self.reporter = _criar_reporter(exclusivo)
+        self.inicio = time.monotonic()
+        self.proxima_exibicao = self.inicio + self.reporter.intervalo
+        self.lock = threading.Lock()
+
+    def avancar(self, n: int) -> None:
+        with self.lock:
+            self.baixados += n
+            agora = time.monotonic()
+            if agora < self.proxima_exibicao:
+                return
+            self.proxima_exibicao = agora + self.reporter.intervalo
+            estado = self.estado(agora)
+        self.reporter.exibir(estado)
+
+    def concluir(self) -> None:
+        with self.lock:
+            estado = self.estado(time.monotonic())
+        self.reporter.finalizar(estado)
+
+    def estado(self, agora: float) -> dict:
+        velocidade = (self.baixados - self.inicial) / max(agora - self.inicio, 1e-6)
+        restante = self.total - self.baixados
+        return {
+            "descricao": self.descricao,
+            "baixados": self.baixados,
+            "total": self.total,
+            "percentual": self.baixados / self.total * 100 if self.total else 0.0,
+            "velocidade": velocidade,
+            "eta_s": restante / velocidade if self.total and velocidade > 0 else None,
+        }
+
+
+# === ARMAZENAMENTO ENDEREÇADO POR CONTEÚDO ===
+def diretorio_estado(repo_path: Optional[str] = None) -> str:
+    """Pasta de estado local dentro do repositório, ignorada pelo Git por um `.gitignore` próprio."""
+    base = os.path.join(repo_path or CHROMEDRIVER_PATH, ESTADO_DIR)
+    gitignore = os.path.join(base, '.gitignore')
+    if not os.path.exists(gitignore):
+        os.makedirs(base, exist_ok=True)
+        with open(gitignore, 'w', encoding='utf-8') as f:
+            f.write('*\n')
+    return base
+
+
+def caminho_cache_versoes(repo_path: Optional[str] = None) -> str:
+    """Cache da consulta de versões em `.autodriver/`, migrando o arquivo antigo da raiz do repositório."""
+    caminho = os.path.join(diretorio_estado(repo_path), CACHE_FILE)
+    antigo = os.path.join(repo_path or CHROMEDRIVER_PATH, CACHE_FILE_ANTIGO)
+    if os.path.exists(antigo) and not os.path.exists(caminho):
+        os.replace(antigo, caminho)
+    return caminho
+
+
+def diretorio_artefatos() -> str:
+    """Raiz do armazenamento de artefatos (ARTEFATOS_PATH ou `.autodriver/artefatos`)."""
+    return ARTEFATOS_PATH or os.path.join(diretorio_estado(), 'artefatos')
+
+
+def caminho_blob(store: str, sha256: str) -> str:
+    """Caminho do artefato com o digest `sha256` dentro do armazenamento."""
+    return os.path.join(store, 'sha256', sha256[:2], sha256)
+
+
+def ler_manifesto(store: str) -> dict:
+    """Lê o manifesto {"artefatos": {"<versão>/<plataforma>": {...}}} do armazenamento."""
+    manifesto = ler_json(os.path.join(store, MANIFESTO_FILE))
+    manifesto.setdefault("artefatos", {})
+    return manifesto
+
+
+def salvar_manifesto(store: str, manifesto: dict) -> None:
+    os.makedirs(store, exist_ok=True)
+    salvar_json(os.path.join(store, MANIFESTO_FILE), manifesto)
+
+
+def obter_artefato(versao: str, plataforma: str, store: Optional[str] = None,
+                   manifesto: Optional[dict] = None) -> Optional[str]:
+    """
+    Retorna o caminho do .zip de `versao`/`plataforma` no armazenamento, ou None.
+
+    A consulta é uma leitura direta no manifesto, sem precisar de checkouts no Git.
+    """
+    store = store or diretorio_artefatos()
+    manifesto = manifesto if manifesto is not None else ler_manifesto(store)
+    entrada = manifesto["artefatos"].get(f"{versao}/{plataforma}")
+    if entrada:
+        caminho = caminho_blob(store, entrada["sha256"])
+        if os.path.exists(caminho):
+            return caminho
+    return None
+
+
+def armazenar_artefato(store: str, manifesto: dict, versao: str, plataforma: str,
+                       caminho_arquivo: str, digests: Dict[str, str]) -> bool:
+    """
+    Registra `caminho_arquivo` no armazenamento sob o seu SHA-256.
+
+    Se o digest já estiver armazenado, apenas o manifesto é atualizado.
+    Retorna True quando um novo conteúdo foi gravado.
+    """
+    destino = caminho_blob(store, digests['sha256'])
+    novo = not os.path.exists(destino)
+    if novo:
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        shutil.copyfile(caminho_arquivo, f"{destino}.tmp")
+        os.replace(f"{destino}.tmp", destino)
+    entrada = manifesto["artefatos"].setdefault(f"{versao}/{plataforma}", {"digests": {}})
+    entrada.update({
+        "sha256": digests['sha256'],
+        "tamanho": os.path.getsize(destino),
+        "arquivo": nome_zip(plataforma),
+    })
+    entrada["digests"].update(digests)
+    return novo
+
+
+def recuperar_artefato(store: str, manifesto: dict, versao: str, plataforma: str, destino: str,
+                       algoritmos: Sequence[str] = ('sha256',)) -> Optional[Dict[str, str]]:
+    """
+    Copia o artefato de `versao`/`plataforma` para `destino`, se já estiver armazenado.
+
+    Retorna os digests pedidos (os que faltarem no manifesto são calculados a
+    partir do arquivo armazenado) ou None se o artefato precisar ser baixado.
+    """
+    caminho = obter_artefato(versao, plataforma, store, manifesto)
+    if not caminho:
+        return None
+    shutil.copyfile(caminho, destino)
+    digests = manifesto["artefatos"][f"{versao}/{plataforma}"]["digests"]
+    faltantes = {nome: hashlib.new(nome) for nome in algoritmos if nome not in digests}
+    if faltantes:
+        with open(caminho, 'rb') as f:
+            _atualizar_hashes(f, list(faltantes.values()))
+        digests.update(_digests(faltantes))
+    return {nome: digests[nome] for nome in algoritmos}
+
+
+# === CACHE DE EXTRAÇÃO ===
+# Cada .zip é descompactado uma única vez em `extraidos/<sha256>/`, uma pasta que
+# não muda depois de criada (os arquivos ficam somente leitura). Os jobs recebem
+# os arquivos por hardlink, reflink ou symlink, com cópia como último recurso, em
+# vez de descompactar o .zip de novo. A data de modificação da pasta marca o
+# último uso, e as menos usadas são removidas quando o total passa de EXTRAIDOS_LIMITE_MB.
+_FICLONE = 0x40049409  # ioctl do Linux que clona um arquivo (reflink) em btrfs, XFS, etc.
+MODOS_MATERIALIZACAO = ('hardlink', 'reflink', 'symlink', 'copia')
+
+
+def diretorio_extraidos() -> str:
+    """Raiz do cache de extração (EXTRAIDOS_PATH ou `.autodriver/extraidos`)."""
+    return EXTRAIDOS_PATH or os.path.join(diretorio_estado(), 'extraidos')
+
+
+def _sha256_do_zip(caminho_zip: str) -> str:
+    """SHA-256 do .zip: o nome do blob no armazenamento, o do `.sha256` ao lado dele (se atualizado) ou calculado."""
+    nome = os.path.basename(caminho_zip)
+    if re.fullmatch(r'[0-9a-f]{64}', nome):
+        return nome
+    return ler_hash_salvo(caminho_zip) or calcular_sha256(caminho_zip)
+
+
+def _remover_somente_leitura(funcao, caminho, _):
+    """`onerror` do shutil.rmtree: libera a escrita (necessário no Windows) e tenta de novo."""
+    os.chmod(caminho, 0o700)
+    funcao(caminho)
+
+
+def extrair_em_cache(caminho_zip: str, sha256: Optional[str] = None) -> str:
+    """
+    Retorna a pasta com o conteúdo de `caminho_zip`, descompactando-o só na primeira vez.
+
+    A extração é feita em uma pasta temporária e renomeada no fim; se outro
+    processo extrair o mesmo .zip ao mesmo tempo, a cópia dele é mantida.
+    """
+    import zipfile
+
+    sha256 = sha256 or _sha256_do_zip(caminho_zip)
+    raiz = diretorio_extraidos()
+    pasta = os.path.join(raiz, sha256)
+    if os.path.isdir(pasta):
+        os.utime(pasta)
+        return pasta
+
+    with medir('extracao', bytes=os.path.getsize(caminho_zip)):
+        temporaria = os.path.join(raiz, f"{sha256}.tmp-{os.getpid()}-{threading.get_ident()}")
+        shutil.rmtree(temporaria, ignore_errors=True)
+        try:
+            with zipfile.ZipFile(caminho_zip) as z:
+                for item in z.infolist():
+                    destino = z.extract(item, temporaria)
+                    if not item.is_dir():
+                        # O zipfile não restaura as permissões; elas vêm do atributo externo (Unix) do .zip.
+                        executavel = (item.external_attr >> 16) & 0o111 or os.path.basename(destino).startswith('chromedriver')
+                        os.chmod(destino, 0o555 if executavel else 0o444)
+        except zipfile.BadZipFile as e:
+            if os.path.isdir(temporaria):
+                shutil.rmtree(temporaria, onerror=_remover_somente_leitura)
+            raise ValueError(f"'{caminho_zip}' não é um .zip válido: {e}")
+        try:
+            os.rename(temporaria, pasta)
+        except OSError:
+            if not os.path.isdir(pasta):
+                raise
+            shutil.rmtree(temporaria, onerror=_remover_somente_leitura)
+    log(f"'{os.path.basename(caminho_zip)}' extraído no cache ({sha256[:12]}).", style=Style.CYAN)
+    podar_extraidos(manter=sha256)
+    return pasta
+
+
+def _remover_materializado(alvo: str, relativo: str) -> None:
+    """
+    Remove um arquivo entregue antes em `destino`, sem alterar o cache.
+
+    O alvo pode ser um hardlink para um arquivo do cache, que é somente leitura e
+    compartilha as permissões com ele. No POSIX basta o `unlink`. No Windows,
+    arquivos somente leitura não podem ser apagados: a permissão só é liberada se o
+    `unlink` falhar e, quando o arquivo tem outras ligações, ela é restaurada na
+    cópia do cache que compartilha o mesmo arquivo.
+    """
+    try:
+        os.unlink(alvo)
+        return
+    except PermissionError:
+        if os.name != 'nt':
+            raise
+    ligacoes = [] if os.stat(alvo).st_nlink == 1 else [
+        candidato for candidato in (os.path.join(entrada.path, relativo) for entrada in os.scandir(diretorio_extraidos()))
+        if os.path.isfile(candidato) and os.path.samefile(candidato, alvo)]
+    os.chmod(alvo, 0o700)
+    os.unlink(alvo)
+    for candidato in ligacoes:
+        os.chmod(candidato, 0o555)
+
+
+def _reflink(origem: str, destino: str) -> None:
+    import fcntl
+
+    with open(origem, 'rb') as f_origem, open(destino, 'wb') as f_destino:
+        fcntl.ioctl(f_destino.fileno(), _FICLONE, f_origem.fileno())
+    shutil.copymode(origem, destino)
+
+
+def _materializar_arquivo(origem: str, destino: str, modo: str) -> None:
+    if modo == 'hardlink':
+        os.link(origem, destino)
+    elif modo == 'reflink':
+        try:
+            _reflink(origem, destino)
+        except (ImportError, OSError):
+            if os.path.exists(destino):
+                os.remove(destino)
+            raise OSError("reflink não suportado")
+    elif modo == 'symlink':
+        os.symlink(origem, destino)
+    else:
+        shutil.copy2(origem, destino)
+
+
+def materializar(pasta_extraida: str, destino: str, modos: Sequence[str] = MODOS_MATERIALIZACAO) -> str:
+    """
+    Disponibiliza em `destino` os arquivos de uma pasta do cache de extração.
+
+    Tenta cada modo de `modos` na ordem (hardlink, reflink, symlink, cópia), e o
+    primeiro que funcionar passa a ser tentado primeiro nos demais arquivos.
+    Arquivos já existentes em `destino` são substituídos, exceto os que já são
+    hardlinks para o próprio arquivo do cache. Retorna o modo usado.
+    """
+    ordem = list(modos)
+    for base, _, arquivos in os.walk(pasta_extraida):
+        relativo = os.path.relpath(base, pasta_extraida)
+        os.makedirs(os.path.join(destino, relativo), exist_ok=True)
+        for nome in arquivos:
+            origem = os.path.join(base, nome)
+            alvo = os.path.normpath(os.path.join(destino, relativo, nome))
+            if os.path.lexists(alvo):
+                if not os.path.islink(alvo) and os.path.samefile(alvo, origem):
+                    continue
+                _remover_materializado(alvo, os.path.relpath(origem, pasta_extraida))
+            for modo in ordem:
+                try:
+                    _materializar_arquivo(origem, alvo, modo)
+                except OSError:
+                    if modo == ordem[-1]:
+                        raise
+                    continue
+                ordem.remove(modo)
+                ordem.insert(0, modo)
+                break
+    return ordem[0]
+
+
+def podar_extraidos(limite_mb: float = EXTRAIDOS_LIMITE_MB, manter: Optional[str] = None) -> int:
+    """Remove as pastas menos usadas do cache de extração até o total caber em `limite_mb`. Retorna quantas removeu."""
+    raiz = diretorio_extraidos()
+    pastas = []
+    for entrada in os.scandir(raiz):
+        if entrada.is_dir() and '.tmp-' not in entrada.name:
+            tamanho = sum(os.path.getsize(os.path.join(base, nome))
+                          for base, _, arquivos in os.walk(entrada.path) for nome in arquivos)
+            pastas.append((entrada.stat().st_mtime, entrada.name, entrada.path, tamanho))
+    total = sum(pasta[3] for pasta in pastas)
+    removidas = 0
+    for _, nome, caminho, tamanho in sorted(pastas):
+        if total <= limite_mb * 1024 * 1024:
+            break
+        if nome == manter:
+            continue
+        shutil.rmtree(caminho, onerror=_remover_somente_leitura)
+        total -= tamanho
+        removidas += 1
+    if removidas:
+        log(f"{removidas} pasta(s) removida(s) do cache de extração (limite: {limite_mb:g}MB).", style=Style.CYAN)
+    return removidas
+
+
+# === PATCHES BINÁRIOS ===
+# Versões consecutivas do ChromeDriver compartilham a maior parte dos bytes. Ao
+# armazenar uma nova versão, é gerado um patch do executável extraído da versão
+# anterior para o da nova: com o `zstd --patch-from` (CLI, padrão) ou com o pacote
+# opcional `bsdiff4`. O patch fica em `patches/` no armazenamento e é listado no
+# manifesto, com tamanhos e hashes de origem e destino, para que agentes com a
+# versão anterior baixem só o patch.
+_EXTENSOES_PATCH = {'zstd': '.zst', 'bsdiff': '.bsdiff'}
+
+
+def _executavel_driver(pasta_extraida: str) -> Optional[str]:
+    """Caminho relativo (com '/') do executável do ChromeDriver dentro de uma pasta extraída."""
+    for base, _, arquivos in os.walk(pasta_extraida):
+        for nome in arquivos:
+            if nome in ('chromedriver', 'chromedriver.exe'):
+                return os.path.relpath(os.path.join(base, nome), pasta_extraida).replace(os.sep, '/')
+    return None
+
+
+def _criar_patch(formato: str, origem: str, destino: str, caminho_patch: str) -> None:
+    if formato == 'bsdiff':
+        import bsdiff4
+
+        bsdiff4.file_diff(origem, destino, caminho_patch)
+    else:
+        subprocess.run(['zstd', '-q', '-f', '-19', f'--patch-from={origem}', destino, '-o', caminho_patch],
+                       check=True, capture_output=True)
+
+
+def gerar_patch(store: str, manifesto: dict, versao_anterior: str, versao: str, plataforma: str,
+                formato: str = PATCHES_FORMATO) -> Optional[dict]:
+    """
+    Gera o patch do executável de `versao_anterior` para o de `versao` e o registra no manifesto.
+
+    Os dois .zip precisam estar no armazenamento; os executáveis vêm do cache de
+    extração. Retorna a entrada adicionada a `patches` no manifesto da nova versão,
+    ou None se não houver o que comparar ou se o patch não for menor que o .zip.
+    """
+    if formato not in _EXTENSOES_PATCH:
+        raise ValueError(f"Formato de patch desconhecido: '{formato}'.")
+    anterior = obter_artefato(versao_anterior, plataforma, store, manifesto)
+    atual = obter_artefato(versao, plataforma, store, manifesto)
+    if not anterior or not atual:
+        return None
+    pasta_anterior, pasta_atual = extrair_em_cache(anterior), extrair_em_cache(atual)
+    arquivo, arquivo_anterior = _executavel_driver(pasta_atual), _executavel_driver(pasta_anterior)
+    if not arquivo or not arquivo_anterior:
+        return None
+    origem = os.path.join(pasta_anterior, *arquivo_anterior.split('/'))
+    destino = os.path.join(pasta_atual, *arquivo.split('/'))
+    sha256_origem, sha256_destino = calcular_sha256(origem), calcular_sha256(destino)
+    if sha256_origem == sha256_destino:
+        return None
+
+    relativo = f"patches/{sha256_origem[:16]}-{sha256_destino[:16]}{_EXTENSOES_PATCH[formato]}"
+    caminho_patch = os.path.join(store, *relativo.split('/'))
+    if not os.path.exists(caminho_patch):
+        os.makedirs(os.path.dirname(caminho_patch), exist_ok=True)
+        with medir('patch', formato=formato, bytes=os.path.getsize(destino)):
+            _criar_patch(formato, origem, destino, f"{caminho_patch}.tmp")
+        os.replace(f"{caminho_patch}.tmp", caminho_patch)
+
+    entrada = manifesto["artefatos"][f"{versao}/{plataforma}"]
+    if os.path.getsize(caminho_patch) >= entrada["tamanho"]:
+        log(f"O patch {versao_anterior} -> {versao} ({plataforma}) não é menor que o .zip. Descartado.", style=Style.YELLOW)
+        os.remove(caminho_patch)
+        return None
+    patch = {
+        "de": versao_anterior,
+        "formato": formato,
+        "caminho": relativo,
+        "tamanho": os.path.getsize(caminho_patch),
+        "sha256": calcular_sha256(caminho_patch),
+        "arquivo": arquivo,
+        "sha256_origem": sha256_origem,
+        "sha256_destino": sha256_destino,
+        "tamanho_destino": os.path.getsize(destino),
+    }
+    entrada["patches"] = [p for p in entrada.get("patches", []) if p["de"] != versao_anterior] + [patch]
+    log(f"Patch {versao_anterior} -> {versao} ({plataforma}): {patch['tamanho'] / (1024*1024):.2f}MB "
+        f"({patch['tamanho'] / max(patch['tamanho_destino'], 1):.1%} do executável).", style=Style.CYAN)
+    return patch
+
+
+def aplicar_patch(origem: str, caminho_patch: str, destino: str, formato: str = 'zstd',
+                  sha256_destino: Optional[str] = None) -> None:
+    """Reconstrói em `destino` o executável da nova versão a partir do anterior (`origem`) e do patch, conferindo o SHA-256."""
+    temporario = f"{destino}.tmp"
+    if formato == 'bsdiff':
+        import bsdiff4
+
+        bsdiff4.file_patch(origem, temporario, caminho_patch)
+    else:
+        subprocess.run(['zstd', '-q', '-d', '-f', f'--patch-from={origem}', caminho_patch, '-o', temporario],
+                       check=True, capture_output=True)
+    if sha256_destino and calcular_sha256(temporario) != sha256_destino.lower():
+        os.remove(temporario)
+        raise ValueError("O SHA-256 do arquivo reconstruído não confere com o esperado.")
+    shutil.copymode(origem, temporario)
+    os.replace(temporario, destino)
+
+
+# === CATÁLOGO DE VERSÕES ===
+# Banco SQLite (modo WAL) em `.autodriver/catalogo.sqlite3` com cada versão e
+# plataforma já vista: canal, URL, tamanho, SHA-256, quando foi baixada e o
+# commit/tag que a contém. Responde por índice o que antes exigia varrer o
+# `git log` e as tags. O sqlite3 só é importado quando há uma versão nova a
+# registrar ou uma consulta ao catálogo; uma verificação sem novidade não o carrega.
+_ESQUEMA_CATALOGO = """
+CREATE TABLE IF NOT EXISTS versoes (
+    versao      TEXT    NOT NULL,
+    plataforma  TEXT    NOT NULL,
+    milestone   INTEGER NOT NULL,
+    ordem       INTEGER NOT NULL,
+    canal       TEXT,
+    url         TEXT,
+    tamanho     INTEGER,
+    sha256      TEXT,
+    baixado_em  TEXT,
+    commit_git  TEXT,
+    tag         TEXT,
+    visto_em    TEXT    NOT NULL,
+    PRIMARY KEY (versao, plataforma)
+);
+CREATE INDEX IF NOT EXISTS idx_versoes_milestone ON versoes (milestone, plataforma, ordem);
+CREATE INDEX IF NOT EXISTS idx_versoes_sha256 ON versoes (sha256);
+"""
+_COLUNAS_CATALOGO = ('canal', 'url', 'tamanho', 'sha256', 'baixado_em', 'commit_git', 'tag')
+
+
+def _ordem_versao(versao: str) -> int:
+    """Inteiro que ordena as versões numericamente (cada parte da versão ocupa 16 bits)."""
+    ordem = 0
+    for parte in (versao.split('.') + ['0'] * 4)[:4]:
+        ordem = (ordem << 16) | min(int(parte), 0xFFFF)
+    return ordem
+
+
+def abrir_catalogo(repo_path: Optional[str] = None):
+    """Abre (criando, se preciso) o catálogo de versões e retorna a conexão sqlite3."""
+    import sqlite3
+
+    conexao = sqlite3.connect(os.path.join(diretorio_estado(repo_path), CATALOGO_FILE), timeout=30)
+    conexao.row_factory = sqlite3.Row
+    conexao.execute('PRAGMA journal_mode=WAL')
+    conexao.execute('PRAGMA synchronous=NORMAL')
+    conexao.executescript(_ESQUEMA_CATALOGO)
+    return conexao
+
+
+def registrar_no_catalogo(registros: Sequence[dict], repo_path: Optional[str] = None) -> None:
+    """
+    Insere ou atualiza `registros` ({"versao", "plataforma", ...}) no catálogo, em uma única transação.
+
+    Campos ausentes ou None não apagam o que já estava registrado. Falhas do
+    catálogo são apenas avisadas: ele não interrompe o fluxo principal.
+    """
+    import sqlite3
+
+    if not registros:
+        return
+    atualizacoes = ', '.join(f"{coluna} = COALESCE(excluded.{coluna}, {coluna})" for coluna in _COLUNAS_CATALOGO)
+    comando = (f"INSERT INTO versoes (versao, plataforma, milestone, ordem, visto_em, {', '.join(_COLUNAS_CATALOGO)}) "
+               f"VALUES (?, ?, ?, ?, ?{', ?' * len(_COLUNAS_CATALOGO)}) "
+               f"ON CONFLICT (versao, plataforma) DO UPDATE SET visto_em = excluded.visto_em, {atualizacoes}")
+    agora = datetime.now().isoformat(timespec='seconds')
+    linhas = [(r["versao"], r["plataforma"], int(r["versao"].split('.')[0]), _ordem_versao(r["versao"]), agora)
+              + tuple(r.get(coluna) for coluna in _COLUNAS_CATALOGO) for r in registros]
+    try:
+        conexao = abrir_catalogo(repo_path)
+        try:
+            with conexao:
+                conexao.executemany(comando, linhas)
+        finally:
+            conexao.close()
+    except sqlite3.Error as e:
+        log(f"Falha ao atualizar o catálogo de versões: {e}", style=Style.YELLOW)
+
+
+def consultar_ultima_do_milestone(milestone: int, plataforma: str, repo_path: Optional[str] = None) -> Optional[dict]:
+    """Registro da versão mais recente de `milestone` (ex.: 126) para `plataforma`, ou None."""
+    conexao = abrir_catalogo(repo_path)
+    try:
+        linha = conexao.execute("SELECT * FROM versoes WHERE milestone = ? AND plataforma = ? "
+                                "ORDER BY ordem DESC LIMIT 1", (milestone, plataforma)).fetchone()
+    finally:
+        conexao.close()
+    return dict(linha) if linha else None
+
+
+def consultar_por_sha256(sha256: str, repo_path: Optional[str] = None) -> list:
+    """Registros (versão, plataforma, commit, tag...) cujo .zip tem o digest `sha256`."""
+    conexao = abrir_catalogo(repo_path)
+    try:
+        linhas = conexao.execute("SELECT * FROM versoes WHERE sha256 = ? ORDER BY ordem",
+                                 (sha256.lower(),)).fetchall()
+    finally:
+        conexao.close()
+    return [dict(linha) for linha in linhas]
+
+
+# === MODOS DE ARMAZENAMENTO NO REPOSITÓRIO ===
+def configurar_lfs(repo_path: str) -> str:
+    """
+    Garante que os .zip sejam versionados pelo Git LFS e retorna o `.gitattributes` a commitar.
+
+    O Git guarda apenas o ponteiro; o binário vai para o servidor LFS no push
+    (configurável com `git config lfs.url`, inclusive um `file://` local para testes).
+    """
+    try:
+        subprocess.run(['git', 'lfs', 'install', '--local'], cwd=repo_path, capture_output=True, check=True)
+    except (FileNotFoundError, subprocess.CalledProcessError):
+        raise RuntimeError("O Git LFS não está disponível. Instale-o (https://git-lfs.com) para usar "
+                           "CHROMEDRIVER_ARMAZENAMENTO=lfs.")
+    caminho = os.path.join(repo_path, '.gitattributes')
+    conteudo = ''
+    if os.path.exists(caminho):
+        with open(caminho, 'r', encoding='utf-8') as f:
+            conteudo = f.read()
+    if f"{LFS_PADRAO} filter=lfs" not in conteudo:
+        subprocess.run(['git', 'lfs', 'track', LFS_PADRAO], cwd=repo_path, capture_output=True, check=True)
+    return '.gitattributes'
+
+
+def publicar_release_assets(canal: str, versao: str, tag: str, zips: Dict[str, Dict[str, str]]) -> str:
+    """
+    Publica os .zip de um canal em RELEASE_ASSETS_PATH/<tag>/ e grava o manifesto do canal.
+
+    O manifesto (`artefatos.json`, com tamanho, SHA-256 e localização de cada
+    arquivo) é o que vai para o Git no lugar dos binários. Retorna o seu caminho
+    relativo ao repositório.
+    """
+    destino_dir = os.path.join(RELEASE_ASSETS_PATH, tag)
+    os.makedirs(destino_dir, exist_ok=True)
+    arquivos = {}
+    for caminho_zip, digests in zips.items():
+        nome = os.path.basename(caminho_zip)
+        destino = os.path.join(destino_dir, nome)
+        shutil.copyfile(caminho_zip, f"{destino}.tmp")
+        os.replace(f"{destino}.tmp", destino)
+        arquivos[nome] = {
+            "sha256": digests['sha256'],
+            "tamanho": os.path.getsize(destino),
+            "caminho": f"{tag}/{nome}",
+            "url": f"{RELEASE_ASSETS_URL.rstrip('/')}/{tag}/{nome}" if RELEASE_ASSETS_URL else None,
+        }
+    manifesto_rel = '/'.join(filter(None, [diretorio_canal(canal), RELEASE_MANIFESTO_FILE]))
+    salvar_json(os.path.join(CHROMEDRIVER_PATH, manifesto_rel),
+                {"canal": canal, "versao": versao, "tag": tag, "arquivos": arquivos})
+    log(f"{len(arquivos)} arquivo(s) publicados em '{destino_dir}'.", style=Style.CYAN)
+    return manifesto_rel
+
+
+# === FLUXO PRINCIPAL ===
+# Mantém o cache de versões já lido entre os ciclos do modo daemon.
+_caches_em_memoria: Dict[str, dict] = {}
+
+
+def _ler_cache_versoes(caminho_cache: Optional[str]) -> dict:
+    return _caches_em_memoria.get(caminho_cache) or (ler_json(caminho_cache) if caminho_cache else {})
+
+
+def _cabecalhos_condicionais(cache: dict) -> dict:
+    """Cabeçalhos If-None-Match / If-Modified-Since a partir do cache de versões."""
+    headers = {}
+    if cache.get("canais"):
+        if cache.get("etag"):
+            headers["If-None-Match"] = cache["etag"]
+        if cache.get("last_modified"):
+            headers["If-Modified-Since"] = cache["last_modified"]
+    return headers
+
+
+def _processar_resposta_canais(caminho_cache: Optional[str], cache: dict, status: int,
+                               headers, conteudo: bytes) -> dict:
+    """Interpreta a resposta do API de versões (200 ou 304) e atualiza o cache."""
+    if status == 304 and cache.get("canais"):
+        cache["acertos"] = cache.get("acertos", 0) + 1
+        cache["bytes_economizados"] = cache.get("bytes_economizados", 0) + cache.get("tamanho_resposta", 0)
+        salvar_json(caminho_cache, cache)
+        log(f"JSON não modificado (304). Usando o cache local "
+            f"(acertos: {cache['acertos']}, economizados: {cache['bytes_economizados'] / 1024:.1f}KB).", style=Style.CYAN)
+        canais = cache["canais"]
+    else:
+        canais = _extrair_canais(json.loads(conteudo))
+        if caminho_cache:
+            cache.update({
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+                "tamanho_resposta": len(conteudo),
+                "canais": canais,
+            })
+            salvar_json(caminho_cache, cache)
+            # Cópia fiel do JSON, servida pelo subcomando `serve`.
+            caminho_espelho = os.path.join(os.path.dirname(caminho_cache), VERSOES_ESPELHO_FILE)
+            with open(f"{caminho_espelho}.tmp", 'wb') as f:
+                f.write(conteudo)
+            os.replace(f"{caminho_espelho}.tmp", caminho_espelho)
+    if caminho_cache:
+        _caches_em_memoria[caminho_cache] = cache
+    return canais
+
+
+def consultar_canais(caminho_cache: Optional[str] = None) -> dict:
+    """
+    Consulta o API de versões e retorna {canal: {"version", "chromedriver": {plataforma: url}}}.
+
+    Se `caminho_cache` for informado, a consulta é condicional (If-None-Match /
+    If-Modified-Since) e uma resposta 304 reaproveita o resultado já processado,
+    sem baixar nem interpretar o JSON novamente.
+    """
+    log("Consultando o API de versões do ChromeDriver...", style=Style.CYAN)
+    with medir('consulta_versoes') as metrica:
+        cache = _ler_cache_versoes(caminho_cache)
+        response = obter_sessao().get(JSON_URL, headers=_cabecalhos_condicionais(cache), timeout=15)
+        # `elapsed` vai do envio até os cabeçalhos: DNS, conexão, TLS e espera pelo servidor.
+        metrica.update(status=response.status_code, bytes=len(response.content),
+                       ate_cabecalhos_s=round(response.elapsed.total_seconds(), 6))
+        if not (response.status_code == 304 and cache.get("canais")):
+            response.raise_for_status()
+        return _processar_resposta_canais(caminho_cache, cache, response.status_code, response.headers, response.content)
+
+
+def _versao_e_urls(canal: dict, plataformas: Sequence[str]) -> Tuple[str, Dict[str, str]]:
+    urls = {}
+    for plataforma in plataformas:
+        url = canal["chromedriver"].get(plataforma)
+        if not url:
+            raise ValueError(f"URL do {nome_zip(plataforma)} não encontrada no JSON!")
+        urls[plataforma] = url
+    return canal["version"], urls
+
+
+def obter_versao_e_urls(plataformas: Sequence[str],
+                        caminho_cache: Optional[str] = None) -> Tuple[str, Dict[str, str]]:
+    """Obtém a versão estável e as URLs de download de cada plataforma, com uma única consulta."""
+    return _versao_e_urls(consultar_canais(caminho_cache)["Stable"], plataformas)
+
+
+def obter_versoes_por_canal(canais: Sequence[str], plataformas: Sequence[str],
+                            caminho_cache: Optional[str] = None) -> Dict[str, Tuple[str, Dict[str, str]]]:
+    """Obtém {canal: (versão, {plataforma: url})} para todos os canais pedidos, com uma única consulta."""
+    dados = consultar_canais(caminho_cache)
+    return {canal: _versao_e_urls(dados[canal], plataformas) for canal in canais}
+
+
+def obter_ultima_versao_e_url(caminho_cache: Optional[str] = None) -> Tuple[str, str]:
+    """Obtém a versão e a URL de download do último ChromeDriver estável para win64."""
+    version, urls = obter_versao_e_urls(['win64'], caminho_cache)
+    return version, urls['win64']
+
+
+def ler_versao_salva(path: str) -> Optional[str]:
+    """Lê a versão salva localmente do arquivo de texto."""
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read().strip()
+    return None
+
+
+def salvar_versao(path: str, version: str) -> None:
+    """Salva a string da versão em um arquivo de texto."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(version)
+
+
+def _erro_transitorio(erro: Exception) -> bool:
+    """Indica se uma falha de rede vale uma nova tentativa (conexão, timeout ou HTTP 5xx)."""
+    if isinstance(erro, requests.exceptions.HTTPError):
+        return erro.response is not None and erro.response.status_code >= 500
+    return isinstance(erro, (requests.exceptions.ConnectionError,
+                             requests.exceptions.Timeout,
+                             requests.exceptions.ChunkedEncodingError))
+
+
+def _digests(hashers: dict) -> Dict[str, str]:
+    return {nome: h.hexdigest() for nome, h in hashers.items()}
+
+
+def _baixar_parte(url: str, destino: str, caminho_validador: Optional[str],
+                  algoritmos: Sequence[str], exibir_progresso: bool = True) -> Tuple[int, Dict[str, str]]:
+    """
+    Baixa `url` para `destino`, continuando de onde parou quando possível.
+
+    Com `caminho_validador`, um arquivo parcial existente é retomado via `Range`
+    (protegido por `If-Range` com o ETag salvo). Se o servidor responder 200 em vez
+    de 206, o download recomeça do zero. Cada bloco recebido alimenta os hashes de
+    `algoritmos`; só o trecho já existente em disco é relido ao retomar.
+    Retorna quantos bytes foram reaproveitados e os digests do arquivo completo.
+    """
+    hashers = {nome: hashlib.new(nome) for nome in algoritmos}
+    validador = ler_json(caminho_validador) if caminho_validador else {}
+    inicio = 0
+    if validador.get("url") == url and os.path.exists(destino):
+        inicio = os.path.getsize(destino)
+        if inicio and inicio == validador.get("content_length"):
+            with open(destino, 'rb') as f:
+                _atualizar_hashes(f, list(hashers.values()))
+            return inicio, _digests(hashers)
+
+    headers = {}
+    if inicio:
+        headers["Range"] = f"bytes={inicio}-"
+        if validador.get("etag"):
+            headers["If-Range"] = validador["etag"]
+
+    response = obter_sessao().get(url, stream=True, timeout=60, headers=headers)
+    response.raise_for_status()
+    anotar_metrica(ate_cabecalhos_s=round(response.elapsed.total_seconds(), 6))
+
+    total_range = response.headers.get('Content-Range', '').rpartition('/')[2]
+    if inicio and response.status_code == 206 and total_range == str(validador.get("content_length")):
+        log(f"Retomando download a partir de {inicio / (1024*1024):.2f}MB.", style=Style.CYAN)
+    elif inicio:
+        log("O servidor não aceitou a retomada. Reiniciando o download completo.", style=Style.YELLOW)
+        inicio = 0
+        if response.status_code == 206:
+            response.close()
+            response = obter_sessao().get(url, stream=True, timeout=60)
+            response.raise_for_status()
+    total_size = inicio + int(response.headers.get('Content-Length', 0))
+
+    if caminho_validador:
+        salvar_json(caminho_validador, {
+            "url": url,
+            "etag": response.headers.get('ETag'),
+            "content_length": total_size,
+        })
+
+    if inicio:
+        with open(destino, 'rb') as f:
+            _atualizar_hashes(f, list(hashers.values()), limite=inicio)
+
+    downloaded_size = inicio
+    progresso = Progresso(_nome_transferencia(destino), total_size, inicio, exibir_progresso)
+    with open(destino, 'ab' if inicio else 'wb') as f:
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            if chunk:
+                f.write(chunk)
+                for h in hashers.values():
+                    h.update(chunk)
+                downloaded_size += len(chunk)
+                progresso.avancar(len(chunk))
+    progresso.concluir()
+
+    if total_size and downloaded_size != total_size:
+        raise requests.exceptions.ConnectionError(
+            f"Download incompleto: {downloaded_size} de {total_size} bytes recebidos.")
+    return inicio, _digests(hashers)
+
+
+def baixar_arquivo_com_progresso(url: str, path: str, retomavel: bool = True,
+                                 tentativas: int = DOWNLOAD_TENTATIVAS,
+                                 algoritmos: Sequence[str] = ('sha256',),
+                                 exibir_progresso: bool = True) -> Dict[str, str]:
+    """
+    Baixa um arquivo exibindo uma barra de progresso e retorna seus digests.
+
+    Os hashes de `algoritmos` (ex.: 'sha256', 'sha512', 'md5') são calculados em
+    uma única passada, sobre os blocos à medida que chegam, sem reler o arquivo.
+
+    No modo `retomavel`, os dados são gravados em `<path>.part` junto com um
+    validador (`<path>.part.json` com URL, ETag e Content-Length). Falhas de rede
+    ou uma nova execução do script retomam o download com requisições `Range`, e o
+    arquivo final só substitui `path` quando estiver completo.
+    """
+    destino = f"{path}.part" if retomavel else path
+    caminho_validador = f"{path}.part.json" if retomavel else None
+    with medir('download', arquivo=os.path.basename(path), segmentos=1) as metrica:
+        falhas = 0
+        bytes_retomados = 0
+        inicio_transferencia = time.monotonic()
+
+        while True:
+            try:
+                retomados, digests = _baixar_parte(url, destino, caminho_validador, algoritmos, exibir_progresso)
+                bytes_retomados += retomados
+                break
+            except requests.exceptions.RequestException as e:
+                falhas += 1
+                metrica["novas_tentativas"] = falhas
+                if not _erro_transitorio(e) or falhas >= tentativas:
+                    raise
+                espera = min(2 ** falhas, 30)
+                log(f"Falha no download ({e}). Tentativa {falhas + 1}/{tentativas} em {espera}s...", style=Style.YELLOW)
+                time.sleep(espera)
+
+        if retomavel:
+            os.replace(destino, path)
+            os.remove(caminho_validador)
+        tamanho_mb = (os.path.getsize(path) - bytes_retomados) / (1024*1024)
+        duracao = max(time.monotonic() - inicio_transferencia, 1e-6)
+        metrica.update(bytes=os.path.getsize(path) - bytes_retomados, bytes_retomados=bytes_retomados,
+                       mb_s=round(tamanho_mb / duracao, 2))
+        log(f"Download de '{os.path.basename(path)}' concluído: {tamanho_mb / duracao:.2f}MB/s. (novas tentativas: {falhas}, bytes retomados: "
+            f"{bytes_retomados / (1024*1024):.2f}MB)", style=Style.GREEN)
+        return digests
+
+
+def _escrever_na_posicao(f, dados: bytes, posicao: int) -> None:
+    """Grava `dados` no deslocamento `posicao` (pwrite quando o SO oferece, senão seek + write)."""
+    if hasattr(os, 'pwrite'):
+        os.pwrite(f.fileno(), dados, posicao)
+    else:
+        f.seek(posicao)
+        f.write(dados)
+
+
+def _baixar_segmento(url: str, destino: str, segmento: list, tentativas: int, progresso, registrar) -> int:
+    """
+    Baixa o intervalo de `segmento` ([inicio, fim, posição]) direto na posição correspondente de `destino`.
+
+    A posição avança conforme os dados são gravados, e `registrar` persiste de
+    tempos em tempos o andamento de todos os segmentos; um segmento retomado
+    começa da última posição registrada.
+    """
+    inicio, fim = segmento[0], segmento[1]
+    falhas = 0
+    with open(destino, 'r+b', buffering=0) as f:
+        while segmento[2] <= fim:
+            try:
+                with obter_sessao().get(url, stream=True, timeout=60,
+                                        headers={"Range": f"bytes={segmento[2]}-{fim}"}) as response:
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        raise ValueError("O servidor deixou de atender requisições Range durante o download.")
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        if chunk:
+                            _escrever_na_posicao(f, chunk, segmento[2])
+                            segmento[2] += len(chunk)
+                            progresso(len(chunk))
+                            registrar()
+                if segmento[2] <= fim:
+                    raise requests.exceptions.ConnectionError(f"Segmento {inicio}-{fim} incompleto.")
+            except requests.exceptions.RequestException as e:
+                registrar(forcar=True)
+                falhas += 1
+                if not _erro_transitorio(e) or falhas >= tentativas:
+                    raise
+                time.sleep(min(2 ** falhas, 30))
+    return falhas
+
+
+def _segmentos_retomaveis(caminho_validador: str, destino: str, url: str, etag: Optional[str],
+                          total_size: int) -> Optional[list]:
+    """Segmentos salvos de um download anterior do mesmo arquivo (mesma URL, tamanho e ETag), ou None."""
+    validador = ler_json(caminho_validador)
+    if (validador.get("url") == url and validador.get("content_length") == total_size
+            and validador.get("etag") == etag and os.path.exists(destino)
+            and os.path.getsize(destino) == total_size):
+        return validador.get("segmentos")
+    return None
+
+
+def baixar_arquivo_segmentado(url: str, path: str, segmentos: int = DOWNLOAD_SEGMENTOS,
+                              tentativas: int = DOWNLOAD_TENTATIVAS,
+                              algoritmos: Sequence[str] = ('sha256',),
+                              exibir_progresso: bool = True) -> Dict[str, str]:
+    """
+    Baixa um arquivo com várias conexões simultâneas, uma por intervalo de bytes.
+
+    O arquivo é pré-alocado e cada segmento é gravado na sua posição por uma
+    thread que compartilha a sessão HTTP. Sem `Accept-Ranges: bytes` (ou com
+    `segmentos` <= 1) cai automaticamente no download de fluxo único.
+
+    O andamento de cada segmento fica em `<path>.seg.json` (com URL, ETag e
+    Content-Length, como o `.part.json` do fluxo único): uma nova execução retoma
+    cada segmento de onde parou, e um arquivo alterado no servidor recomeça do zero.
+    Como os segmentos chegam fora de ordem, os digests são calculados ao final,
+    relendo o arquivo.
+    """
+    if segmentos > 1:
+        head = obter_sessao().head(url, allow_redirects=True, timeout=15)
+        head.raise_for_status()
+        total_size = int(head.headers.get('Content-Length', 0))
+        if head.headers.get('Accept-Ranges', '').lower() != 'bytes' or total_size <= 0:
+            log("O servidor não aceita requisições Range. Usando download de fluxo único.", style=Style.YELLOW)
+            segmentos = 1
+    if segmentos <= 1:
+        return baixar_arquivo_com_progresso(url, path, tentativas=tentativas, algoritmos=algoritmos,
+                                            exibir_progresso=exibir_progresso)
+
+    with medir('download', arquivo=os.path.basename(path)) as metrica:
+        destino = f"{path}.seg"
+        caminho_validador = f"{path}.seg.json"
+        etag = head.headers.get('ETag')
+        intervalos = _segmentos_retomaveis(caminho_validador, destino, url, etag, total_size)
+        if intervalos:
+            bytes_retomados = sum(posicao - inicio for inicio, _, posicao in intervalos)
+            log(f"Retomando download segmentado a partir de {bytes_retomados / (1024*1024):.2f}MB.", style=Style.CYAN)
+        else:
+            bytes_retomados = 0
+            with open(destino, 'wb') as f:
+                f.truncate(total_size)
+            tamanho_segmento = -(-total_size // segmentos)
+            intervalos = [[inicio, min(inicio + tamanho_segmento, total_size) - 1, inicio]
+                          for inicio in range(0, total_size, tamanho_segmento)]
+
+        trava = threading.Lock()
+        ultimo_registro = [0.0]
+
+        def registrar(forcar: bool = False) -> None:
+            with trava:
+                if forcar or time.monotonic() - ultimo_registro[0] >= 1:
+                    ultimo_registro[0] = time.monotonic()
+                    salvar_json(caminho_validador, {"url": url, "etag": etag, "content_length": total_size,
+                                                    "segmentos": [list(s) for s in intervalos]})
+
+        registrar(forcar=True)
+        progresso = Progresso(f"{os.path.basename(path)} ({len(intervalos)} segmentos)", total_size,
+                              bytes_retomados, exclusivo=exibir_progresso)
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        inicio_transferencia = time.monotonic()
+        with ThreadPoolExecutor(max_workers=len(intervalos)) as executor:
+            futuros = [executor.submit(_baixar_segmento, url, destino, segmento, tentativas, progresso.avancar, registrar)
+                       for segmento in intervalos]
+            falhas = sum(futuro.result() for futuro in futuros)
+        progresso.concluir()
+        duracao = max(time.monotonic() - inicio_transferencia, 1e-6)
+
+        hashers = {nome: hashlib.new(nome) for nome in algoritmos}
+        with open(destino, 'rb') as f:
+            _atualizar_hashes(f, list(hashers.values()))
+        os.replace(destino, path)
+        os.remove(caminho_validador)
+        baixados = total_size - bytes_retomados
+        metrica.update(segmentos=len(intervalos), bytes=baixados, bytes_retomados=bytes_retomados,
+                       novas_tentativas=falhas, mb_s=round(baixados / (1024*1024) / duracao, 2))
+        log(f"Download de '{os.path.basename(path)}' concluído: {baixados / (1024*1024) / duracao:.2f}MB/s com {len(intervalos)} segmentos. "
+            f"(novas tentativas: {falhas}, bytes retomados: {bytes_retomados / (1024*1024):.2f}MB)", style=Style.GREEN)
+        return _digests(hashers)
+
+
+def baixar_em_paralelo(downloads: Dict[str, str], algoritmos: Sequence[str] = ('sha256',),
+                       paralelismo: int = DOWNLOAD_PARALELISMO) -> Dict[str, Dict[str, str]]:
+    """
+    Baixa cada {caminho_destino: url} de `downloads`, no máximo `paralelismo` por vez.
+
+    Retorna {caminho_destino: digests}. Com mais de um arquivo a barra de progresso
+    no terminal dá lugar a linhas periódicas, para não misturar as barras.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    exibir_progresso = len(downloads) == 1
+    with ThreadPoolExecutor(max_workers=max(1, min(paralelismo, len(downloads)))) as executor:
+        futuros = {
+            caminho: executor.submit(baixar_arquivo_segmentado, url, caminho,
+                                     algoritmos=algoritmos, exibir_progresso=exibir_progresso)
+            for caminho, url in downloads.items()
+        }
+        return {caminho: futuro.result() for caminho, futuro in futuros.items()}
+
+
+# === MOTOR ASSÍNCRONO ===
+# Variantes asyncio das funções de consulta e download. Com o pacote opcional
+# `httpx` as requisições usam um único AsyncClient; sem ele, cada chamada síncrona
+# roda em uma thread via asyncio.to_thread. Em ambos os casos gravação em disco e
+# hashes saem do loop de eventos para não bloquear as demais transferências.
+# O asyncio só é importado quando o motor assíncrono é usado.
+def _importar_httpx():
+    try:
+        import httpx
+    except ImportError:
+        return None
+    return httpx
+
+
+def _cliente_async(paralelismo: int = DOWNLOAD_PARALELISMO):
+    """Retorna o AsyncClient do httpx (como gerenciador de contexto) ou um contexto vazio sem o httpx."""
+    httpx = _importar_httpx()
+    if httpx is None:
+        log("O pacote 'httpx' não está instalado. O motor assíncrono usará threads.", style=Style.YELLOW)
+        return nullcontext(None)
+    limites = httpx.Limits(max_connections=paralelismo + 1, max_keepalive_connections=paralelismo + 1)
+    return httpx.AsyncClient(follow_redirects=True, limits=limites)
+
+
+def _erro_transitorio_async(erro: Exception) -> bool:
+    """Equivalente a `_erro_transitorio` para as exceções do httpx."""
+    httpx = _importar_httpx()
+    if httpx is None:
+        return False
+    if isinstance(erro, httpx.HTTPStatusError):
+        return erro.response.status_code >= 500
+    return isinstance(erro, httpx.TransportError)
+
+
+def _erro_de_rede_async(erro: Exception) -> bool:
+    httpx = _importar_httpx()
+    return httpx is not None and isinstance(erro, httpx.HTTPError)
+
+
+async def consultar_canais_async(caminho_cache: Optional[str] = None, cliente=None) -> dict:
+    """Variante assíncrona de `consultar_canais`, com a mesma consulta condicional e o mesmo cache."""
+    import asyncio
+
+    if cliente is None:
+        return await asyncio.to_thread(consultar_canais, caminho_cache)
+    log("Consultando o API de versões do ChromeDriver...", style=Style.CYAN)
+    with medir('consulta_versoes') as metrica:
+        cache = _ler_cache_versoes(caminho_cache)
+        response = await cliente.get(JSON_URL, headers=_cabecalhos_condicionais(cache), timeout=15)
+        metrica.update(status=response.status_code, bytes=len(response.content),
+                       ate_cabecalhos_s=round(response.elapsed.total_seconds(), 6))
+        if not (response.status_code == 304 and cache.get("canais")):
+            response.raise_for_status()
+        return await asyncio.to_thread(_processar_resposta_canais, caminho_cache, cache, response.status_code,
+                                       response.headers, response.content)
+
+
+async def obter_versoes_por_canal_async(canais: Sequence[str], plataformas: Sequence[str],
+                                        caminho_cache: Optional[str] = None,
+                                        cliente=None) -> Dict[str, Tuple[str, Dict[str, str]]]:
+    """Variante assíncrona de `obter_versoes_por_canal`."""
+    dados = await consultar_canais_async(caminho_cache, cliente)
+    return {canal: _versao_e_urls(dados[canal], plataformas) for canal in canais}
+
+
+async def obter_ultima_versao_e_url_async(caminho_cache: Optional[str] = None, cliente=None) -> Tuple[str, str]:
+    """Variante assíncrona de `obter_ultima_versao_e_url`."""
+    dados = await consultar_canais_async(caminho_cache, cliente)
+    version, urls = _versao_e_urls(dados["Stable"], ['win64'])
+    return version, urls['win64']
+
+
+def _gravar_bloco(f, chunk: bytes, hashers: Sequence) -> None:
+    f.write(chunk)
+    for h in hashers:
+        h.update(chunk)
+
+
+async def _receber_async(response, url: str, destino: str, caminho_validador: Optional[str],
+                         inicio: int, hashers: dict) -> Tuple[int, Dict[str, str]]:
+    """Grava o corpo de `response` em `destino` a partir de `inicio`, alimentando os hashes."""
+    import asyncio
+
+    total_size = inicio + int(response.headers.get('Content-Length', 0))
+    if caminho_validador:
+        salvar_json(caminho_validador, {
+            "url": url,
+            "etag": response.headers.get('ETag'),
+            "content_length": total_size,
+        })
+    if inicio:
+        with open(destino, 'rb') as f:
+            await asyncio.to_thread(_atualizar_hashes, f, list(hashers.values()), inicio)
+
+    downloaded_size = inicio
+    progresso = Progresso(_nome_transferencia(destino), total_size, inicio, exclusivo=False)
+    with open(destino, 'ab' if inicio else 'wb') as f:
+        async for chunk in response.aiter_bytes(CHUNK_SIZE):
+            await asyncio.to_thread(_gravar_bloco, f, chunk, list(hashers.values()))
+            downloaded_size += len(chunk)
+            progresso.avancar(len(chunk))
+    progresso.concluir()
+
+    if total_size and downloaded_size != total_size:
+        raise _importar_httpx().ReadError(
+            f"Download incompleto: {downloaded_size} de {total_size} bytes recebidos.")
+    return inicio, _digests(hashers)
+
+
+async def _baixar_parte_async(cliente, url: str, destino: str, caminho_validador: Optional[str],
+                              algoritmos: Sequence[str]) -> Tuple[int, Dict[str, str]]:
+    """Variante assíncrona de `_baixar_parte` (mesmo validador e mesma retomada via `Range`)."""
+    import asyncio
+
+    hashers = {nome: hashlib.new(nome) for nome in algoritmos}
+    validador = ler_json(caminho_validador) if caminho_validador else {}
+    inicio = 0
+    if validador.get("url") == url and os.path.exists(destino):
+        inicio = os.path.getsize(destino)
+        if inicio and inicio == validador.get("content_length"):
+            with open(destino, 'rb') as f:
+                await asyncio.to_thread(_atualizar_hashes, f, list(hashers.values()))
+            return inicio, _digests(hashers)
+
+    headers = {}
+    if inicio:
+        headers["Range"] = f"bytes={inicio}-"
+        if validador.get("etag"):
+            headers["If-Range"] = validador["etag"]
+
+    async with cliente.stream('GET', url, headers=headers, timeout=60) as response:
+        response.raise_for_status()
+        total_range = response.headers.get('Content-Range', '').rpartition('/')[2]
+        if inicio and response.status_code == 206 and total_range == str(validador.get("content_length")):
+            log(f"Retomando download a partir de {inicio / (1024*1024):.2f}MB.", style=Style.CYAN)
+            return await _receber_async(response, url, destino, caminho_validador, inicio, hashers)
+        if inicio:
+            log("O servidor não aceitou a retomada. Reiniciando o download completo.", style=Style.YELLOW)
+        if response.status_code != 206:
+            return await _receber_async(response, url, destino, caminho_validador, 0, hashers)
+
+    async with cliente.stream('GET', url, timeout=60) as response:
+        response.raise_for_status()
+        return await _receber_async(response, url, destino, caminho_validador, 0, hashers)
+
+
+async def baixar_arquivo_com_progresso_async(url: str, path: str, retomavel: bool = True,
+                                             tentativas: int = DOWNLOAD_TENTATIVAS,
+                                             algoritmos: Sequence[str] = ('sha256',),
+                                             cliente=None) -> Dict[str, str]:
+    """
+    Variante assíncrona de `baixar_arquivo_com_progresso`; retorna os digests do arquivo.
+
+    Sem `cliente` (httpx ausente) ou com DOWNLOAD_SEGMENTOS > 1, o download
+    síncrono correspondente roda em uma thread. Como vários arquivos são baixados
+    ao mesmo tempo, o andamento sai em linhas periódicas em vez da barra.
+    """
+    import asyncio
+
+    if cliente is None or DOWNLOAD_SEGMENTOS > 1:
+        return await asyncio.to_thread(baixar_arquivo_segmentado, url, path, tentativas=tentativas,
+                                       algoritmos=algoritmos, exibir_progresso=False)
+
+    destino = f"{path}.part" if retomavel else path
+    caminho_validador = f"{path}.part.json" if retomavel else None
+    with medir('download', arquivo=os.path.basename(path), segmentos=1) as metrica:
+        falhas = 0
+        bytes_retomados = 0
+        inicio_transferencia = time.monotonic()
+
+        while True:
+            try:
+                retomados, digests = await _baixar_parte_async(cliente, url, destino, caminho_validador, algoritmos)
+                bytes_retomados += retomados
+                break
+            except Exception as e:
+                falhas += 1
+                metrica["novas_tentativas"] = falhas
+                if not _erro_transitorio_async(e) or falhas >= tentativas:
+                    raise
+                espera = min(2 ** falhas, 30)
+                log(f"Falha no download ({e}). Tentativa {falhas + 1}/{tentativas} em {espera}s...", style=Style.YELLOW)
+                await asyncio.sleep(espera)
+
+        if retomavel:
+            os.replace(destino, path)
+            os.remove(caminho_validador)
+        tamanho_mb = (os.path.getsize(path) - bytes_retomados) / (1024*1024)
+        duracao = max(time.monotonic() - inicio_transferencia, 1e-6)
+        metrica.update(bytes=os.path.getsize(path) - bytes_retomados, bytes_retomados=bytes_retomados,
+                       mb_s=round(tamanho_mb / duracao, 2))
+        log(f"Download de '{os.path.basename(path)}' concluído: {tamanho_mb / duracao:.2f}MB/s. (novas tentativas: {falhas}, bytes retomados: "
+            f"{bytes_retomados / (1024*1024):.2f}MB)", style=Style.GREEN)
+        return digests
+
+
+def git_push_com_tag(repo_path: str, files_to_add: list, tag: Union[str, Sequence[str]], message: str,
+                     enviar_sempre: bool = False) -> Optional[Dict[str, str]]:
+    """
+    Verifica alterações, faz commit, cria e envia uma ou mais tags para o repositório Git.
+
+    Retorna {tag: SHA do commit para o qual ela aponta}, ou None se houve erro.
+    Uma tag que já existia (ex.: criada pelo backfill) pode apontar para outro
+    commit que não o HEAD; tags que existem só no remoto ficam de fora.
+    Com `enviar_sempre`, o push acontece mesmo sem commit nem tag novos (para
+    reenviar um push que falhou). Com GIT_BACKEND=dulwich as operações rodam no próprio processo Python, sem
+    criar um processo `git` por etapa. Se o dulwich não estiver instalado, o
+    backend via subprocess é usado.
+    """
+    tags = [tag] if isinstance(tag, str) else list(tag)
+    backend = GIT_BACKEND
+    if backend == 'dulwich' and ARMAZENAMENTO == 'lfs':
+        log("O modo LFS depende dos hooks do Git LFS. Usando o git via subprocess.", style=Style.YELLOW)
+        backend = 'subprocess'
+    if backend == 'dulwich':
+        try:
+            import dulwich  # noqa: F401
+        except ImportError:
+            log("O pacote 'dulwich' não está instalado. Usando o git via subprocess.", style=Style.YELLOW)
+            backend = 'subprocess'
+
+    with medir('git', backend=backend, tags=len(tags)) as metrica:
+        if backend == 'dulwich':
+            commits = _git_push_com_tag_dulwich(repo_path, files_to_add, tags, message, enviar_sempre)
+        else:
+            commits = _git_push_com_tag_subprocess(repo_path, files_to_add, tags, message, enviar_sempre)
+    log(f"Etapa Git ({backend}) concluída em {metrica['duracao_s']:.2f}s.", style=Style.CYAN)
+    return commits
+
+
+_STATUS_PUSH = {' ': 'atualizado', '+': 'forcado', '-': 'removido', '*': 'novo', '!': 'rejeitado', '=': 'sem-alteracao'}
+# Trechos de mensagens de erro de rede passageiros, do git e (nas últimas linhas) do dulwich/SO.
+_ERROS_TRANSITORIOS_GIT = ('could not resolve host', 'timed out', 'connection reset', 'connection refused',
+                           'rpc failed', 'early eof', 'remote end hung up', 'temporarily unavailable',
+                           'returned error: 5',
+                           'unexpectedly closed the connection', 'name or service not known',
+                           'temporary failure in name resolution', 'unexpected http resp 5')
+
+
+def _interpretar_push_porcelain(saida: str) -> list:
+    """Converte a saída de `git push --porcelain` em [{"ref", "status", "resumo"}]."""
+    refs = []
+    for linha in saida.splitlines():
+        partes = linha.split('\t')
+        if len(partes) >= 3 and partes[0] in _STATUS_PUSH:
+            refs.append({"ref": partes[1].split(':')[-1], "status": _STATUS_PUSH[partes[0]], "resumo": partes[2]})
+    return refs
+
+
+def _registrar_resultado_push(repo_path: str, resultado: dict) -> None:
+    """Grava o resultado do último push em `.autodriver/push-resultado.json` e resume cada ref no log."""
+    resultado["quando"] = datetime.now().isoformat(timespec='seconds')
+    anotar_metrica(novas_tentativas=resultado["tentativas"] - 1, push_sucesso=resultado["sucesso"])
+    salvar_json(os.path.join(diretorio_estado(repo_path), PUSH_RESULTADO_FILE), resultado)
+    for ref in resultado["refs"]:
+        style = Style.RED if ref["status"] == 'rejeitado' else Style.CYAN
+        log(f"  {ref['ref']}: {ref['status']} ({ref['resumo']})", style=style)
+
+
+def _tags_existentes_subprocess(tags: Sequence[str]) -> Tuple[set, set]:
+    """
+    Retorna (tags locais, tags só no remoto) dentre `tags`, consultando cada ref diretamente.
+
+    Localmente é uma única chamada a `git for-each-ref` com os nomes completos das
+    refs, sem listar todas as tags. Com GIT_VERIFICAR_TAG_REMOTA, o `git ls-remote`
+    é filtrado pelas mesmas refs, detectando tags que existem só no remoto sem
+    precisar buscá-las.
+    """
+    refs = [f'refs/tags/{tag}' for tag in tags]
+    resultado = subprocess.run(['git', 'for-each-ref', '--format=%(refname)'] + refs,
+                               capture_output=True, text=True, check=True)
+    locais = {ref[len('refs/tags/'):] for ref in resultado.stdout.split()}
+    remotas = set()
+    if GIT_VERIFICAR_TAG_REMOTA:
+        resultado = subprocess.run(['git', 'ls-remote', '--tags', 'origin'] + refs,
+                                   capture_output=True, text=True, check=True)
+        encontradas = {linha.split('\t')[1] for linha in resultado.stdout.splitlines() if '\t' in linha}
+        remotas = {tag for tag in tags if f'refs/tags/{tag}' in encontradas} - locais
+    return locais, remotas
+
+
+def _avisar_tags_remotas(tags_remotas: set) -> None:
+    for tag in sorted(tags_remotas):
+        log(f"A tag '{Style.BOLD}{tag}{Style.RESET}{Style.YELLOW}' já existe no remoto (mas não localmente). "
+            f"Não será criada novamente.", style=Style.YELLOW)
+
+
+def _git_push_atomico_subprocess(repo_path: str, refspecs: Sequence[str]) -> None:
+    """
+    Envia todas as `refspecs` em um único `git push --atomic`.
+
+    Ou todas as refs são atualizadas no remoto, ou nenhuma. Falhas de rede
+    transitórias são repetidas com backoff exponencial até GIT_PUSH_TENTATIVAS vezes.
+    """
+    comando = ['git', 'push', '--atomic', '--porcelain', 'origin'] + list(refspecs)
+    for tentativa in range(1, GIT_PUSH_TENTATIVAS + 1):
+        resultado = subprocess.run(comando, capture_output=True, text=True)
+        registro = {"backend": "subprocess", "tentativas": tentativa, "sucesso": resultado.returncode == 0,
+                    "refs": _interpretar_push_porcelain(resultado.stdout)}
+        if resultado.returncode == 0:
+            _registrar_resultado_push(repo_path, registro)
+            return
+        rejeitado = any(ref["status"] == 'rejeitado' for ref in registro["refs"])
+        transitorio = not rejeitado and any(padrao in resultado.stderr.lower() for padrao in _ERROS_TRANSITORIOS_GIT)
+        if not transitorio or tentativa == GIT_PUSH_TENTATIVAS:
+            registro["erro"] = resultado.stderr.strip()
+            _registrar_resultado_push(repo_path, registro)
+            raise subprocess.CalledProcessError(resultado.returncode, comando, resultado.stdout, resultado.stderr)
+        espera = min(2 ** tentativa, 30)
+        log(f"Falha transitória no push. Tentativa {tentativa + 1}/{GIT_PUSH_TENTATIVAS} em {espera}s...", style=Style.YELLOW)
+        time.sleep(espera)
+
+
+def _git_push_com_tag_subprocess(repo_path: str, files_to_add: list, tags: Sequence[str], message: str,
+                                 enviar_sempre: bool = False) -> Optional[Dict[str, str]]:
+    try:
+        with change_dir(repo_path):
+            houve_commit = False
+            status_result = subprocess.run(['git', 'status', '--porcelain'] + files_to_add, capture_output=True, text=True, check=True)
+            if not status_result.stdout.strip():
+                log("Nenhuma alteração detectada nos arquivos. Pulando commit.", style=Style.YELLOW)
+            else:
+                log("Alterações detectadas. Criando o commit...", style=Style.CYAN)
+                subprocess.run(['git', 'add'] + files_to_add, check=True)
+                subprocess.run(['git', 'commit', '-q', '-m', message], check=True)
+                houve_commit = True
+
+            tags_locais, tags_remotas = _tags_existentes_subprocess(tags)
+            _avisar_tags_remotas(tags_remotas)
+            novas_tags = []
+            for tag in tags:
+                if tag in tags_locais:
+                    log(f"A tag '{Style.BOLD}{tag}{Style.RESET}{Style.YELLOW}' já existe. Não será criada novamente.", style=Style.YELLOW)
+                elif tag not in tags_remotas:
+                    log(f"Criando a tag '{Style.BOLD}{tag}{Style.RESET}{Style.CYAN}'...", style=Style.CYAN)
+                    subprocess.run(['git', 'tag', tag], check=True)
+                    novas_tags.append(tag)
+
+            if houve_commit or novas_tags or enviar_sempre:
+                log("Enviando commit e tags em um único push atômico...", style=Style.CYAN)
+                _git_push_atomico_subprocess(repo_path, ['HEAD'] + [f'refs/tags/{tag}' for tag in tags
+                                                                     if tag not in tags_remotas])
+                log("Commit e tags enviados com sucesso.", style=Style.GREEN)
+            locais = [tag for tag in tags if tag not in tags_remotas]
+            if not locais:
+                return {}
+            resultado = subprocess.run(['git', 'rev-parse'] + [f'refs/tags/{tag}^{{commit}}' for tag in locais],
+                                       capture_output=True, text=True, check=True)
+            return dict(zip(locais, resultado.stdout.split()))
+
+    except FileNotFoundError:
+        anotar_metrica(resultado='erro', erro="git não encontrado")
+        log("ERRO: O 'git' não foi encontrado. Verifique se ele está instalado e no PATH do sistema.", style=Style.RED)
+    except subprocess.CalledProcessError as e:
+        anotar_metrica(resultado='erro', erro=str(e))
+        log(f"ERRO ao executar comandos Git: {e}", style=Style.RED)
+        log(f"Stderr: {e.stderr}", style=Style.RED)
+    return None
+
+
+def _tags_remotas_dulwich(repo, tags: Sequence[str]) -> set:
+    """Tags de `tags` presentes no remoto, pedindo ao servidor apenas essas refs (protocolo v2)."""
+    from dulwich import porcelain
+    from dulwich.client import get_transport_and_path
+
+    refs = [b'refs/tags/' + tag.encode() for tag in tags]
+    _, url = porcelain.get_remote_repo(repo, 'origin')
+    cliente, caminho = get_transport_and_path(url)
+    encontradas = cliente.get_refs(caminho, protocol_version=2, ref_prefix=refs).refs
+    return {tag for tag, ref in zip(tags, refs) if ref in encontradas}
+
+
+def _interpretar_push_dulwich(resultado, refspecs: Sequence[bytes], antes: Dict[bytes, Optional[bytes]]) -> list:
+    """
+    Converte o `SendPackResult` do dulwich em [{"ref", "status", "resumo"}].
+
+    Usa os mesmos status de `_STATUS_PUSH` que o backend subprocess. `antes` traz o
+    SHA que se sabe que cada ref tinha no remoto antes do push (ausente para refs novas).
+    """
+    from dulwich.protocol import ZERO_SHA
+
+    ref_status = resultado.ref_status if resultado.ref_status is not None else dict.fromkeys(refspecs)
+    novas = resultado.refs or {}
+    refs = []
+    for ref in dict.fromkeys([*refspecs, *ref_status]):
+        erro, anterior, nova = ref_status.get(ref), antes.get(ref), novas.get(ref)
+        if erro:
+            codigo, resumo = '!', erro
+        elif anterior == nova:
+            codigo, resumo = '=', '[up to date]'
+        elif nova in (None, ZERO_SHA):
+            codigo, resumo = '-', '[deleted]'
+        elif anterior is None:
+            codigo, resumo = '*', '[new tag]' if ref.startswith(b'refs/tags/') else '[new branch]'
+        else:
+            codigo, resumo = ' ', f"{anterior[:7].decode()}..{nova[:7].decode()}"
+        refs.append({"ref": ref.decode(), "status": _STATUS_PUSH[codigo], "resumo": resumo})
+    return refs
+
+
+def _push_dulwich(repo, refspecs: Sequence[bytes]):
+    """`porcelain.push` atômico com a saída do dulwich repassada ao `log()`, em vez de ir direto ao stdout/stderr."""
+    from dulwich import porcelain
+
+    saida, erros = io.BytesIO(), io.BytesIO()
+    try:
+        return porcelain.push(repo, 'origin', refspecs=list(refspecs), atomic=True, outstream=saida, errstream=erros)
+    finally:
+        for fluxo in (saida, erros):
+            for linha in fluxo.getvalue().decode('utf-8', 'replace').split('\n'):
+                # O progresso reescreve a mesma linha com '\r'; só o último estado vai para o log.
+                linha = linha.rstrip('\r').rsplit('\r', 1)[-1].strip()
+                if linha:
+                    log(f"  {linha}", style=Style.BLUE)
+
+
+def _git_push_atomico_dulwich(repo, repo_path: str, refspecs: Sequence[bytes],
+                              antes: Dict[bytes, Optional[bytes]]) -> None:
+    """Equivalente a `_git_push_atomico_subprocess` usando o cliente do dulwich."""
+    from dulwich import porcelain
+    from dulwich.errors import GitProtocolError, HangupException
+
+    for tentativa in range(1, GIT_PUSH_TENTATIVAS + 1):
+        try:
+            resultado = _push_dulwich(repo, refspecs)
+        except (OSError, HangupException, GitProtocolError) as e:
+            # Mesma classificação do backend subprocess: autenticação, permissão etc. não são repetidas.
+            transitorio = any(padrao in str(e).lower() for padrao in _ERROS_TRANSITORIOS_GIT)
+            if not transitorio or tentativa == GIT_PUSH_TENTATIVAS:
+                _registrar_resultado_push(repo_path, {"backend": "dulwich", "tentativas": tentativa,
+                                                      "sucesso": False, "refs": [], "erro": str(e)})
+                raise
+            espera = min(2 ** tentativa, 30)
+            log(f"Falha transitória no push ({e}). Tentativa {tentativa + 1}/{GIT_PUSH_TENTATIVAS} em {espera}s...", style=Style.YELLOW)
+            time.sleep(espera)
+            continue
+        except Exception as e:
+            _registrar_resultado_push(repo_path, {"backend": "dulwich", "tentativas": tentativa, "sucesso": False,
+                                                  "refs": [], "erro": f"{type(e).__name__}: {e}"})
+            raise
+
+        refs = _interpretar_push_dulwich(resultado, refspecs, antes)
+        sucesso = not any(ref["status"] == 'rejeitado' for ref in refs)
+        _registrar_resultado_push(repo_path, {"backend": "dulwich", "tentativas": tentativa,
+                                              "sucesso": sucesso, "refs": refs})
+        if not sucesso:
+            raise porcelain.Error("O remoto rejeitou o push atômico.")
+        return
+
+
+def _git_push_com_tag_dulwich(repo_path: str, files_to_add: list, tags: Sequence[str], message: str,
+                              enviar_sempre: bool = False) -> Optional[Dict[str, str]]:
+    """Mesmo fluxo de `_git_push_com_tag_subprocess`, executado em processo com o dulwich."""
+    from dulwich import porcelain
+    from dulwich.objects import Tag
+    from dulwich.repo import Repo
+
+    try:
+        with Repo(repo_path) as repo:
+            houve_commit = False
+            porcelain.add(repo, [os.path.join(repo_path, f) for f in files_to_add])
+            arvore = repo.open_index().commit(repo.object_store)
+            try:
+                arvore_head = repo[repo.head()].tree
+            except KeyError:
+                arvore_head = None
+
+            if arvore == arvore_head:
+                log("Nenhuma alteração detectada nos arquivos. Pulando commit.", style=Style.YELLOW)
+            else:
+                log("Alterações detectadas. Criando o commit...", style=Style.CYAN)
+                porcelain.commit(repo, message.encode('utf-8'))
+                houve_commit = True
+
+            tags_locais = {tag for tag in tags if b'refs/tags/' + tag.encode() in repo.refs}
+            # Estado do remoto antes do push, para classificar cada ref como o `git push --porcelain`:
+            # branches pelas refs de acompanhamento e tags locais de ciclos anteriores como já enviadas
+            # (exceto ao reenviar um push que falhou, quando elas justamente não chegaram ao remoto).
+            antes = {b'refs/heads/' + nome: sha for nome, sha in repo.refs.as_dict(b'refs/remotes/origin/').items()}
+            if not enviar_sempre:
+                antes.update((b'refs/tags/' + tag.encode(), repo.refs[b'refs/tags/' + tag.encode()]) for tag in tags_locais)
+            tags_remotas = set()
+            if GIT_VERIFICAR_TAG_REMOTA:
+                tags_remotas = _tags_remotas_dulwich(repo, tags) - tags_locais
+                _avisar_tags_remotas(tags_remotas)
+            novas_tags = []
+            for tag in tags:
+                if tag in tags_locais:
+                    log(f"A tag '{Style.BOLD}{tag}{Style.RESET}{Style.YELLOW}' já existe. Não será criada novamente.", style=Style.YELLOW)
+                elif tag not in tags_remotas:
+                    log(f"Criando a tag '{Style.BOLD}{tag}{Style.RESET}{Style.CYAN}'...", style=Style.CYAN)
+                    porcelain.tag_create(repo, tag)
+                    novas_tags.append(tag)
+
+            if houve_commit or novas_tags or enviar_sempre:
+                log("Enviando commit e tags em um único push atômico...", style=Style.CYAN)
+                refspecs = [b'refs/heads/' + porcelain.active_branch(repo)] + [
+                    b'refs/tags/' + tag.encode() for tag in tags if tag not in tags_remotas]
+                _git_push_atomico_dulwich(repo, repo_path, refspecs, antes)
+                log("Commit e tags enviados com sucesso.", style=Style.GREEN)
+            commits = {}
+            for tag in tags:
+                if tag not in tags_remotas:
+                    objeto = repo[repo.refs[b'refs/tags/' + tag.encode()]]
+                    while isinstance(objeto, Tag):
+                        objeto = repo[objeto.object[1]]
+                    commits[tag] = objeto.id.decode('ascii')
+            return commits
+
+    except Exception as e:
+        anotar_metrica(resultado='erro', erro=f"{type(e).__name__}: {e}")
+        log(f"ERRO ao executar operações Git (dulwich): {e}", style=Style.RED)
+    return None
+
+
+# === BACKFILL HISTÓRICO ===
+def _chave_versao(versao: str) -> Tuple[int, ...]:
+    return tuple(int(parte) for parte in versao.split('.'))
+
+
+def consultar_versoes_conhecidas(plataformas: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, str]]:
+    """
+    Retorna {versão: {plataforma: url}} de todas as versões com ChromeDriver no histórico oficial.
+
+    O JSON é lido em blocos (`iterar_itens_json`), e de cada versão só são mantidas
+    as URLs das `plataformas` pedidas (todas, se omitido).
+    """
+    log("Consultando o histórico de versões do ChromeDriver...", style=Style.CYAN)
+    with medir('consulta_historico') as metrica:
+        with obter_sessao().get(KNOWN_GOOD_URL, timeout=60, stream=True) as response:
+            response.raise_for_status()
+            metrica["bytes"] = 0
+
+            def blocos():
+                for bloco in response.iter_content(JSON_CHUNK_SIZE):
+                    metrica["bytes"] += len(bloco)
+                    yield bloco
+
+            versoes = {}
+            for item in iterar_itens_json(blocos(), "versions"):
+                urls = {d["platform"]: d["url"] for d in item.get("downloads", {}).get("chromedriver", [])
+                        if not plataformas or d["platform"] in plataformas}
+                if urls:
+                    versoes[item["version"]] = urls
+            return versoes
+
+
+def _tags_versionadas() -> set:
+    """Todas as tags locais (e, com GIT_VERIFICAR_TAG_REMOTA, as remotas), sem o prefixo refs/tags/."""
+    resultado = subprocess.run(['git', 'for-each-ref', '--format=%(refname:strip=2)', 'refs/tags/'],
+                               capture_output=True, text=True, check=True)
+    tags = set(resultado.stdout.split())
+    if GIT_VERIFICAR_TAG_REMOTA:
+        resultado = subprocess.run(['git', 'ls-remote', '--tags', '--refs', 'origin'],
+                                   capture_output=True, text=True, check=True)
+        tags |= {linha.split('\t')[1][len('refs/tags/'):] for linha in resultado.stdout.splitlines() if '\t' in linha}
+    return tags
+
+
+def _obter_artefato_historico(store: str, manifesto: dict, versao: str, plataforma: str, url: str,
+                              destino: str, algoritmos: Sequence[str]) -> Dict[str, str]:
+    """Copia o .zip do armazenamento local ou o baixa (com retomada) para `destino`."""
+    digests = recuperar_artefato(store, manifesto, versao, plataforma, destino, algoritmos)
+    if digests:
+        return digests
+    return baixar_arquivo_com_progresso(url, destino, algoritmos=algoritmos, exibir_progresso=False)
+
+
+def _criar_commits_historicos(pastas: Dict[str, str], arquivos_por_versao: Dict[str, list]) -> Dict[str, str]:
+    """
+    Cria um commit avulso (fora de qualquer branch) por versão e a tag `v<versão>` apontando para ele.
+
+    Usa comandos de baixo nível do Git, em lote: um único `hash-object` para todos
+    os arquivos, um único `mktree --batch` para todas as árvores e um único
+    `update-ref --stdin` (atômico) para todas as tags. Deve rodar dentro do repositório.
+    Retorna {tag: commit}.
+    """
+    caminhos = [os.path.join(pastas[versao], nome) for versao in pastas for nome in arquivos_por_versao[versao]]
+    if ARMAZENAMENTO == 'lfs':
+        caminhos.append('.gitattributes')
+    # Com --stdin-paths os filtros do .gitattributes (ex.: LFS) são aplicados a cada arquivo.
+    resultado = subprocess.run(['git', 'hash-object', '-w', '--stdin-paths'], input='\n'.join(caminhos) + '\n',
+                               capture_output=True, text=True, check=True)
+    blobs = dict(zip(caminhos, resultado.stdout.split()))
+
+    entradas = []
+    for versao in pastas:
+        linhas = [f"100644 blob {blobs[os.path.join(pastas[versao], nome)]}\t{nome}" for nome in arquivos_por_versao[versao]]
+        if ARMAZENAMENTO == 'lfs':
+            linhas.append(f"100644 blob {blobs['.gitattributes']}\t.gitattributes")
+        entradas.append('\n'.join(linhas) + '\n')
+    resultado = subprocess.run(['git', 'mktree', '--batch'], input='\n'.join(entradas),
+                               capture_output=True, text=True, check=True)
+    arvores = resultado.stdout.split()
+
+    commits = {}
+    for versao, arvore in zip(pastas, arvores):
+        resultado = subprocess.run(['git', 'commit-tree', arvore, '-m', f"Adiciona ChromeDriver {versao} (histórico)"],
+                                   capture_output=True, text=True, check=True)
+        commits[f"v{versao}"] = resultado.stdout.strip()
+    comandos = ''.join(f"create refs/tags/{tag} {commit}\n" for tag, commit in commits.items())
+    subprocess.run(['git', 'update-ref', '--stdin'], input=comandos, text=True, check=True)
+    return commits
+
+
+def _importar_commits_fast_import(pastas: Dict[str, str], arquivos_por_versao: Dict[str, list]) -> Dict[str, str]:
+    """
+    Equivalente a `_criar_commits_historicos`, mas em um único `git fast-import`.
+
+    Arquivos, commits e tags de todo o lote são enviados em um só fluxo para um
+    processo, que grava tudo direto em um packfile, sem criar um objeto solto por
+    arquivo. Os arquivos são lidos em blocos de CHUNK_SIZE. O fast-import não aplica
+    os filtros do .gitattributes, por isso o modo LFS usa `_criar_commits_historicos`.
+    Deve rodar dentro do repositório. Retorna {tag: commit}.
+    """
+    autor = subprocess.run(['git', 'var', 'GIT_AUTHOR_IDENT'], capture_output=True, text=True, check=True).stdout.strip()
+    committer = subprocess.run(['git', 'var', 'GIT_COMMITTER_IDENT'], capture_output=True, text=True, check=True).stdout.strip()
+    caminho_marcas = os.path.join(diretorio_estado(), 'fast-import-marks')
+    processo = subprocess.Popen(['git', 'fast-import', '--quiet', '--done', '--date-format=raw',
+                                 f'--export-marks={caminho_marcas}'], stdin=subprocess.PIPE)
+    tags = {}
+    try:
+        for marca, versao in enumerate(pastas, start=1):
+            tags[f":{marca}"] = f"v{versao}"
+            mensagem = f"Adiciona ChromeDriver {versao} (histórico)\n".encode('utf-8')
+            processo.stdin.write(f"commit refs/tags/v{versao}\nmark :{marca}\n"
+                                 f"author {autor}\ncommitter {committer}\n"
+                                 f"data {len(mensagem)}\n".encode('utf-8') + mensagem + b"\n")
+            for nome in arquivos_por_versao[versao]:
+                caminho = os.path.join(pastas[versao], nome)
+                processo.stdin.write(f"M 100644 inline {nome}\ndata {os.path.getsize(caminho)}\n".encode('utf-8'))
+                with open(caminho, 'rb') as f:
+                    shutil.copyfileobj(f, processo.stdin, CHUNK_SIZE)
+                processo.stdin.write(b"\n")
+            processo.stdin.write(b"\n")
+        processo.stdin.write(b"done\n")
+    finally:
+        processo.stdin.close()
+        codigo = processo.wait()
+    if codigo != 0:
+        raise subprocess.CalledProcessError(codigo, 'git fast-import')
+
+    commits = {}
+    with open(caminho_marcas, encoding='utf-8') as f:
+        for linha in f:
+            marca, commit = linha.split()
+            if marca in tags:
+                commits[tags[marca]] = commit
+    os.remove(caminho_marcas)
+    return commits
+
+
+def executar_backfill(lote: int = BACKFILL_LOTE, paralelismo: int = DOWNLOAD_PARALELISMO,
+                      desde: Optional[str] = None) -> None:
+    """
+    Baixa e versiona as versões históricas do ChromeDriver que ainda não têm tag.
+
+    A lista vem de `known-good-versions-with-downloads.json` e é comparada com as
+    tags existentes; os .zip já presentes no armazenamento local não são baixados
+    de novo. As versões são processadas em lotes de `lote`: downloads com no máximo
+    `paralelismo` simultâneos, um commit avulso + tag por versão (todos gravados por
+    um único `git fast-import`) e um único push atômico por lote. O andamento fica em `.autodriver/backfill.json`, e uma
+    execução interrompida continua de onde parou (inclusive tags criadas e não enviadas).
+
+    Só entram versões anteriores à Stable salva no `version.txt` (ou, sem ele, à
+    Stable atual): as tags `v<versão>` a partir dela pertencem ao fluxo principal,
+    que as cria no commit do branch.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    if ARMAZENAMENTO == 'release':
+        log("O backfill grava os .zip no repositório e não suporta CHROMEDRIVER_ARMAZENAMENTO=release.", style=Style.RED)
+        return
+
+    caminho_checkpoint = os.path.join(diretorio_estado(), BACKFILL_CHECKPOINT_FILE)
+    checkpoint = {"pendentes_push": ler_json(caminho_checkpoint).get("pendentes_push", [])}
+
+    with change_dir(CHROMEDRIVER_PATH):
+        if checkpoint["pendentes_push"]:
+            # Os nomes são gravados antes da criação das tags: envia só as que chegaram a ser criadas.
+            locais, _ = _tags_existentes_subprocess(checkpoint["pendentes_push"])
+            criadas = [tag for tag in checkpoint["pendentes_push"] if tag in locais]
+            if criadas:
+                log(f"Enviando {len(criadas)} tag(s) criadas na execução anterior...", style=Style.CYAN)
+                _git_push_atomico_subprocess(CHROMEDRIVER_PATH, [f"refs/tags/{tag}" for tag in criadas])
+            checkpoint["pendentes_push"] = []
+            salvar_json(caminho_checkpoint, checkpoint)
+        if ARMAZENAMENTO == 'lfs':
+            configurar_lfs(CHROMEDRIVER_PATH)
+
+        limite = (ler_versao_salva(os.path.join(CHROMEDRIVER_PATH, VERSION_FILE))
+                  or obter_versao_e_urls(PLATAFORMAS, caminho_cache_versoes())[0])
+        conhecidas = consultar_versoes_conhecidas(PLATAFORMAS)
+        existentes = _tags_versionadas()
+        faltantes = sorted((versao for versao in conhecidas
+                            if f"v{versao}" not in existentes
+                            and _chave_versao(versao) < _chave_versao(limite)
+                            and (not desde or _chave_versao(versao) >= _chave_versao(desde))),
+                           key=_chave_versao)
+        log(f"{len(conhecidas)} versões no histórico, {len(faltantes)} anteriores à Stable {limite} "
+            f"sem tag no repositório.", style=Style.BLUE)
+
+        store = diretorio_artefatos()
+        manifesto = ler_manifesto(store)
+        algoritmos = ('sha256',) + tuple(a for a in HASH_ALGORITMOS if a != 'sha256')
+        pasta_staging = os.path.join(diretorio_estado(), 'backfill')
+
+        for numero, inicio in enumerate(range(0, len(faltantes), max(1, lote)), start=1):
+            versoes = faltantes[inicio:inicio + max(1, lote)]
+            log(f"Lote {numero}: {versoes[0]} a {versoes[-1]} ({len(versoes)} versões)...", style=Style.BLUE)
+            with medir('backfill_lote', versoes=len(versoes)) as metrica:
+                pastas = {versao: os.path.join(pasta_staging, versao) for versao in versoes}
+                trabalhos = {}
+                with ThreadPoolExecutor(max_workers=max(1, paralelismo)) as executor:
+                    for versao in versoes:
+                        os.makedirs(pastas[versao], exist_ok=True)
+                        for plataforma in PLATAFORMAS:
+                            url = conhecidas[versao].get(plataforma)
+                            if url:
+                                destino = os.path.join(pastas[versao], nome_zip(plataforma))
+                                trabalhos[(versao, plataforma)] = executor.submit(
+                                    _obter_artefato_historico, store, manifesto, versao, plataforma, url, destino, algoritmos)
+                    digests = {chave: futuro.result() for chave, futuro in trabalhos.items()}
+
+                arquivos_por_versao = {versao: [] for versao in versoes}
+                for (versao, plataforma), digests_zip in digests.items():
+                    caminho_zip = os.path.join(pastas[versao], nome_zip(plataforma))
+                    armazenar_artefato(store, manifesto, versao, plataforma, caminho_zip, digests_zip)
+                    salvar_hash(caminho_zip, digests_zip['sha256'])
+                    arquivos_por_versao[versao] += [nome_zip(plataforma), f"{nome_zip(plataforma)}.sha256"]
+                salvar_manifesto(store, manifesto)
+                for versao in versoes:
+                    salvar_versao(os.path.join(pastas[versao], VERSION_FILE), versao)
+                    arquivos_por_versao[versao].append(VERSION_FILE)
+
+                checkpoint["pendentes_push"] = [f"v{versao}" for versao in versoes]
+                salvar_json(caminho_checkpoint, checkpoint)
+                if ARMAZENAMENTO == 'lfs':
+                    commits = _criar_commits_historicos(pastas, arquivos_por_versao)
+                else:
+                    commits = _importar_commits_fast_import(pastas, arquivos_por_versao)
+                for pasta in pastas.values():
+                    shutil.rmtree(pasta, ignore_errors=True)
+
+                _git_push_atomico_subprocess(CHROMEDRIVER_PATH, [f"refs/tags/{tag}" for tag in commits])
+                baixado_em = datetime.now().isoformat(timespec='seconds')
+                registrar_no_catalogo([{
+                    "versao": versao, "plataforma": plataforma, "url": conhecidas[versao][plataforma],
+                    "tamanho": manifesto["artefatos"][f"{versao}/{plataforma}"]["tamanho"],
+                    "sha256": digests_zip['sha256'], "baixado_em": baixado_em,
+                    "commit_git": commits[f"v{versao}"], "tag": f"v{versao}",
+                } for (versao, plataforma), digests_zip in digests.items()])
+                checkpoint["pendentes_push"] = []
+                salvar_json(caminho_checkpoint, checkpoint)
+                metrica["bytes"] = sum(os.path.getsize(caminho_blob(store, d['sha256'])) for d in digests.values())
+            log(f"Lote {numero} enviado ({len(commits)} tags).", style=Style.GREEN)
+
+    log(f"Backfill concluído. {len(faltantes)} versão(ões) adicionada(s).", style=Style.BOLD + Style.GREEN)
+
+
+# === DRIVER PARA O CHROME INSTALADO ===
+_EXECUTAVEIS_CHROME = ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser')
+_INFO_PLIST_CHROME = '/Applications/Google Chrome.app/Contents/Info.plist'
+_CHAVES_REGISTRO_CHROME = (r'Software\Google\Chrome\BLBeacon', r'Software\WOW6432Node\Google\Chrome\BLBeacon')
+
+
+def plataforma_local() -> str:
+    """Plataforma do Chrome for Testing correspondente a esta máquina (ex.: 'win64', 'linux64', 'mac-arm64')."""
+    import platform
+
+    maquina = platform.machine().lower()
+    if sys.platform == 'win32':
+        return 'win64' if maquina.endswith('64') else 'win32'
+    if sys.platform == 'darwin':
+        return 'mac-arm64' if maquina in ('arm64', 'aarch64') else 'mac-x64'
+    return 'linux64'
+
+
+def _versao_chrome_windows() -> Optional[str]:
+    """Versão gravada pelo Chrome no registro (por usuário ou para a máquina)."""
+    import winreg
+
+    for raiz in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+        for caminho in _CHAVES_REGISTRO_CHROME:
+            try:
+                with winreg.OpenKey(raiz, caminho) as chave:
+                    return winreg.QueryValueEx(chave, 'version')[0]
+            except OSError:
+                continue
+    return None
+
+
+def _versao_chrome_mac() -> Optional[str]:
+    """Versão lida do Info.plist do Google Chrome.app, sem executar o navegador."""
+    import plistlib
+
+    try:
+        with open(_INFO_PLIST_CHROME, 'rb') as f:
+            return plistlib.load(f).get('CFBundleShortVersionString')
+    except OSError:
+        return None
+
+
+def _versao_chrome_linux(cache: dict) -> Optional[str]:
+    """
+    Versão informada por `google-chrome --version` (ou Chromium).
+
+    O resultado fica no cache junto com o caminho e a data de modificação do
+    executável; enquanto o navegador não for atualizado, ele não é executado de novo.
+    """
+    for nome in _EXECUTAVEIS_CHROME:
+        caminho = shutil.which(nome)
+        if not caminho:
+            continue
+        real = os.path.realpath(caminho)
+        mtime = os.stat(real).st_mtime
+        anterior = cache.get("chrome", {})
+        if anterior.get("caminho") == real and anterior.get("mtime") == mtime:
+            return anterior["versao"]
+        resultado = subprocess.run([caminho, '--version'], capture_output=True, text=True, timeout=30)
+        encontrada = re.search(r'\d+\.\d+\.\d+\.\d+', resultado.stdout)
+        if encontrada:
+            cache["chrome"] = {"caminho": real, "mtime": mtime, "versao": encontrada.group()}
+            return encontrada.group()
+    return None
+
+
+def detectar_versao_chrome(cache: Optional[dict] = None) -> str:
+    """Versão do Google Chrome instalado (registro no Windows, Info.plist no macOS, `--version` no Linux)."""
+    if sys.platform == 'win32':
+        versao = _versao_chrome_windows()
+    elif sys.platform == 'darwin':
+        versao = _versao_chrome_mac()
+    else:
+        versao = _versao_chrome_linux(cache if cache is not None else {})
+    if not versao:
+        raise ValueError("Não foi possível detectar a versão do Google Chrome instalado. Use --versao-chrome.")
+    return versao
+
+
+def consultar_builds(plataformas: Sequence[str]) -> Dict[str, dict]:
+    """
+    Retorna {build: {"version", "chromedriver": {plataforma: url}}} de `latest-patch-versions-per-build`.
+
+    O JSON é lido em blocos (`iterar_pares_json`) e só as `plataformas` pedidas são mantidas.
+    """
+    log("Consultando a última versão de cada build do ChromeDriver...", style=Style.CYAN)
+    with medir('consulta_builds') as metrica:
+        with obter_sessao().get(BUILDS_URL, timeout=60, stream=True) as response:
+            response.raise_for_status()
+            metrica["bytes"] = int(response.headers.get('Content-Length', 0))
+            builds = {}
+            for build, dados in iterar_pares_json(response.iter_content(JSON_CHUNK_SIZE), "builds"):
+                urls = {d["platform"]: d["url"] for d in dados.get("downloads", {}).get("chromedriver", [])
+                        if d["platform"] in plataformas}
+                if urls:
+                    builds[build] = {"version": dados["version"], "chromedriver": urls}
+            return builds
+
+
+def _builds_em_cache(cache: dict, plataforma: str) -> Dict[str, dict]:
+    """Dados por build do cache local; consulta a rede só se o cache expirou (BUILDS_CACHE_TTL) ou não cobre `plataforma`."""
+    valido = (time.time() - cache.get("obtido_em", 0) < BUILDS_CACHE_TTL
+              and plataforma in cache.get("plataformas", []))
+    if not valido:
+        plataformas = sorted(set(cache.get("plataformas", [])) | {plataforma})
+        cache.update(obtido_em=time.time(), plataformas=plataformas, builds=consultar_builds(plataformas))
+    return cache["builds"]
+
+
+def resolver_driver_instalado(versao_chrome: Optional[str] = None, plataforma: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Retorna (versão do driver, caminho do .zip) do ChromeDriver compatível com o Chrome instalado.
+
+    O build do Chrome (as três primeiras partes da versão) é procurado nos dados
+    de `latest-patch-versions-per-build`, guardados em `.autodriver/builds-cache.json`
+    por BUILDS_CACHE_TTL segundos. Se o .zip ainda não estiver no armazenamento
+    local, ele é baixado e armazenado. Com cache e armazenamento preenchidos, a
+    resolução não acessa a rede.
+    """
+    plataforma = plataforma or plataforma_local()
+    caminho_cache = os.path.join(diretorio_estado(), BUILDS_CACHE_FILE)
+    cache = ler_json(caminho_cache)
+    versao_chrome = versao_chrome or detectar_versao_chrome(cache)
+    build = '.'.join(versao_chrome.split('.')[:3])
+    builds = _builds_em_cache(cache, plataforma)
+    salvar_json(caminho_cache, cache)
+
+    dados = builds.get(build)
+    if not dados or plataforma not in dados["chromedriver"]:
+        raise ValueError(f"Não há ChromeDriver publicado para o build {build} ({plataforma}).")
+    versao = dados["version"]
+    log(f"Chrome {versao_chrome} (build {build}): ChromeDriver {Style.BOLD}{versao}{Style.RESET}{Style.GREEN} "
+        f"para {plataforma}.", style=Style.GREEN)
+
+    store = diretorio_artefatos()
+    manifesto = ler_manifesto(store)
+    caminho = obter_artefato(versao, plataforma, store, manifesto)
+    if caminho:
+        return versao, caminho
+
+    url = dados["chromedriver"][plataforma]
+    temporario = os.path.join(diretorio_estado(), 'resolver', nome_zip(plataforma))
+    os.makedirs(os.path.dirname(temporario), exist_ok=True)
+    digests = baixar_arquivo_com_progresso(url, temporario)
+    armazenar_artefato(store, manifesto, versao, plataforma, temporario, digests)
+    salvar_manifesto(store, manifesto)
+    os.remove(temporario)
+    registrar_no_catalogo([{"versao": versao, "plataforma": plataforma, "url": url, "sha256": digests['sha256'],
+                            "tamanho": manifesto["artefatos"][f"{versao}/{plataforma}"]["tamanho"],
+                            "baixado_em": datetime.now().isoformat(timespec='seconds')}])
+    return versao, obter_artefato(versao, plataforma, store, manifesto)
+
+
+def notificar(titulo: str, mensagem: str) -> None:
+    """Envia uma notificação para o desktop (o plyer só é carregado aqui)."""
+    try:
+        from plyer import notification
+        notification.notify(title=titulo, message=mensagem, timeout=10)
+    except Exception as e:
+        log(f"Falha ao enviar notificação: {e}", style=Style.YELLOW)
+
+
+# === SERVIDOR ESPELHO ===
+_TIPOS_CONTEUDO = {
+    '.zip': 'application/zip',
+    '.json': 'application/json',
+    '.txt': 'text/plain; charset=utf-8',
+    '.sha256': 'text/plain; charset=utf-8',
+    '.zst': 'application/zstd',
+    '.bsdiff': 'application/octet-stream',
+}
+_etags_memo: Dict[str, Tuple[Tuple[int, int], str]] = {}
+_etags_lock = threading.Lock()
+
+
+def _etag_arquivo(caminho: str) -> str:
+    """
+    ETag forte de um arquivo servido: o seu SHA-256 entre aspas.
+
+    Usa o `<arquivo>.sha256` gravado no download quando ele for mais novo que o
+    arquivo; caso contrário calcula o hash. O resultado fica em memória até o
+    arquivo mudar (mtime/tamanho).
+    """
+    info = os.stat(caminho)
+    chave = (info.st_mtime_ns, info.st_size)
+    with _etags_lock:
+        memo = _etags_memo.get(caminho)
+    if memo and memo[0] == chave:
+        return memo[1]
+
+    etag = f'"{ler_hash_salvo(caminho) or calcular_sha256(caminho)}"'
+    with _etags_lock:
+        _etags_memo[caminho] = (chave, etag)
+    return etag
+
+
+def _intervalo_solicitado(cabecalho: str, tamanho: int) -> Optional[Tuple[int, int]]:
+    """
+    Interpreta um cabeçalho `Range` de intervalo único e retorna (inicio, fim) inclusivos.
+
+    Retorna None para cabeçalhos que não sabemos atender (o arquivo inteiro é
+    enviado) e levanta ValueError para intervalos fora do arquivo (HTTP 416).
+    """
+    unidade, _, especificacao = cabecalho.partition('=')
+    if unidade.strip().lower() != 'bytes' or ',' in especificacao:
+        return None
+    inicio_txt, _, fim_txt = especificacao.strip().partition('-')
+    try:
+        if not inicio_txt:
+            sufixo = int(fim_txt)
+            if sufixo <= 0:
+                raise ValueError("Intervalo vazio.")
+            return max(0, tamanho - sufixo), tamanho - 1
+        inicio = int(inicio_txt)
+        fim = min(int(fim_txt), tamanho - 1) if fim_txt else tamanho - 1
+    except ValueError:
+        if inicio_txt.isdigit() or fim_txt.isdigit():
+            raise
+        return None
+    if inicio >= tamanho or fim < inicio:
+        raise ValueError("Intervalo fora do arquivo.")
+    return inicio, fim
+
+
+def _parte_segura(parte: str) -> bool:
+    """Rejeita partes vazias, ocultas ('.', '..') ou com separadores/unidades do Windows ('\\', ':')."""
+    return bool(parte) and not parte.startswith('.') and '\\' not in parte and ':' not in parte \
+        and not os.path.splitdrive(parte)[0]
+
+
+def _arquivo_dentro_de(base: str, caminho: str) -> Optional[str]:
+    """Retorna `caminho` se for um arquivo que, resolvidos os links, está dentro de `base`; senão None."""
+    base_real = os.path.realpath(base)
+    try:
+        dentro = os.path.commonpath([base_real, os.path.realpath(caminho)]) == base_real
+    except ValueError:  # unidades diferentes no Windows
+        return None
+    return caminho if dentro and os.path.isfile(caminho) else None
+
+
+def _resolver_caminho(raiz: str, caminho_url: str) -> Optional[str]:
+    """
+    Mapeia a URL pedida para um artefato gerenciado em `raiz` (ou para o JSON espelhado).
+
+    Cada parte do caminho é validada e o resultado precisa ficar dentro da pasta
+    servida; caso contrário a resposta é 404.
+    """
+    from urllib.parse import unquote, urlsplit
+
+    caminho_url = unquote(urlsplit(caminho_url).path)
+    if caminho_url in (f"/{VERSOES_ESPELHO_FILE}", f"/{PROGRESSO_FILE}"):
+        caminho = os.path.join(raiz, ESTADO_DIR, caminho_url[1:])
+        return caminho if os.path.isfile(caminho) else None
+    # Manifesto do armazenamento e patches binários, para os agentes atualizarem por patch.
+    store = ARTEFATOS_PATH or os.path.join(raiz, ESTADO_DIR, 'artefatos')
+    if caminho_url == f"/artefatos/{MANIFESTO_FILE}":
+        caminho = os.path.join(store, MANIFESTO_FILE)
+        return caminho if os.path.isfile(caminho) else None
+    if caminho_url.startswith('/artefatos/patches/'):
+        nome = caminho_url[len('/artefatos/patches/'):]
+        if '/' in nome or not _parte_segura(nome) or os.path.splitext(nome)[1] not in _EXTENSOES_PATCH.values():
+            return None
+        pasta_patches = os.path.join(store, 'patches')
+        return _arquivo_dentro_de(pasta_patches, os.path.join(pasta_patches, nome))
+
+    partes = caminho_url.strip('/').split('/')
+    if not all(_parte_segura(parte) for parte in partes):
+        return None
+    if os.path.splitext(partes[-1])[1] not in _TIPOS_CONTEUDO:
+        return None
+    return _arquivo_dentro_de(raiz, os.path.join(raiz, *partes))
+
+
+def _criar_manipulador(raiz: str):
+    """Cria a classe de manipulador HTTP que serve os artefatos de `raiz`."""
+    from email.utils import formatdate
+    from http.server import BaseHTTPRequestHandler
+
+    class ManipuladorEspelho(BaseHTTPRequestHandler):
+        server_version = 'autodriver-espelho'
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, formato, *args):
+            log(f"[serve] {self.address_string()} {formato % args}")
+
+        def do_HEAD(self):
+            self._servir(enviar_corpo=False)
+
+        def do_GET(self):
+            self._servir(enviar_corpo=True)
+
+        def _servir(self, enviar_corpo: bool) -> None:
+            caminho = _resolver_caminho(raiz, self.path)
+            if not caminho:
+                self.send_error(404, "Artefato não encontrado")
+                return
+
+            etag = _etag_arquivo(caminho)
+            info = os.stat(caminho)
+            tamanho = info.st_size
+            if_none_match = [valor.strip() for valor in self.headers.get('If-None-Match', '').split(',')]
+            if etag in if_none_match or '*' in if_none_match:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+            intervalo = None
+            cabecalho_range = self.headers.get('Range')
+            if_range = self.headers.get('If-Range')
+            if cabecalho_range and (not if_range or if_range == etag):
+                try:
+                    intervalo = _intervalo_solicitado(cabecalho_range, tamanho)
+                except ValueError:
+                    self.send_response(416)
+                    self.send_header('Content-Range', f'bytes */{tamanho}')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+            inicio, fim = intervalo or (0, tamanho - 1)
+            quantidade = fim - inicio + 1
+            self.send_response(206 if intervalo else 200)
+            self.send_header('Content-Type', _TIPOS_CONTEUDO.get(os.path.splitext(caminho)[1], 'application/octet-stream'))
+            self.send_header('Content-Length', str(quantidade))
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', formatdate(info.st_mtime, usegmt=True))
+            self.send_header('Accept-Ranges', 'bytes')
+            if intervalo:
+                self.send_header('Content-Range', f'bytes {inicio}-{fim}/{tamanho}')
+            self.end_headers()
+
+            if enviar_corpo and quantidade > 0:
+                with open(caminho, 'rb') as f:
+                    # socket.sendfile usa os.sendfile (cópia zero) quando o SO oferece.
+                    self.connection.sendfile(f, inicio, quantidade)
+
+    return ManipuladorEspelho
+
+
+def servir_espelho(host: str, porta: int) -> None:
+    """
+    Serve por HTTP os artefatos de CHROMEDRIVER_PATH e o JSON de versões espelhado.
+
+    Suporta requisições `Range`, ETags fortes derivadas do SHA-256 e envio com
+    `sendfile`. Os agentes podem baixar `/<canal>/chromedriver-<plataforma>.zip`,
+    os `.sha256`, os `version.txt`, `/last-known-good-versions-with-downloads.json`
+    e o andamento dos downloads do daemon em `/progresso.json`.
+    """
+    from http.server import ThreadingHTTPServer
+
+    servidor = ThreadingHTTPServer((host, porta), _criar_manipulador(CHROMEDRIVER_PATH))
+    log(f"Servindo '{CHROMEDRIVER_PATH}' em http://{host}:{porta}/ (Ctrl+C para encerrar).", style=Style.BLUE)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        log("Servidor encerrado.", style=Style.BLUE)
+    finally:
+        servidor.server_close()
+
+
+def _canais_desatualizados(versoes: Dict[str, Tuple[str, Dict[str, str]]]) -> Dict[str, Tuple[str, Dict[str, str]]]:
+    """
+    Compara cada canal com o seu arquivo de versão e retorna apenas os que mudaram.
+
+    Só as versões novas são registradas no catálogo: uma consulta sem novidade
+    (o caso comum, inclusive a resposta 304) não abre o banco.
+    """
+    atualizados = {}
+    for canal, (versao_recente, urls) in versoes.items():
+        caminho_version = os.path.join(CHROMEDRIVER_PATH, diretorio_canal(canal), VERSION_FILE)
+        versao_salva = ler_versao_salva(caminho_version)
+        log(f"[{canal}] Última versão: {Style.BOLD}{versao_recente}{Style.RESET}{Style.GREEN} "
+            f"| salva localmente: {Style.BOLD}{versao_salva or 'Nenhuma'}", style=Style.GREEN)
+        if versao_salva != versao_recente:
+            atualizados[canal] = (versao_recente, urls)
+    if atualizados:
+        registrar_no_catalogo([{"versao": versao, "plataforma": plataforma, "canal": canal, "url": url}
+                               for canal, (versao, urls) in atualizados.items() for plataforma, url in urls.items()])
+    return atualizados
+
+
+def _planejar_artefatos(atualizados: dict) -> Tuple[Dict[str, Tuple[str, str]], Dict[str, str], Dict[str, str]]:
+    """Retorna, por caminho de .zip, a chave (versão, plataforma), o canal e a URL de download."""
+    chaves = {}
+    canal_do_arquivo = {}
+    urls_por_arquivo = {}
+    for canal, (versao_recente, urls) in atualizados.items():
+        os.makedirs(os.path.join(CHROMEDRIVER_PATH, diretorio_canal(canal)), exist_ok=True)
+        for plataforma, url in urls.items():
+            caminho_zip = os.path.join(CHROMEDRIVER_PATH, diretorio_canal(canal), nome_zip(plataforma))
+            chaves[caminho_zip] = (versao_recente, plataforma)
+            canal_do_arquivo[caminho_zip] = canal
+            urls_por_arquivo[caminho_zip] = url
+    return chaves, canal_do_arquivo, urls_por_arquivo
+
+
+def _obter_versoes_e_artefatos(caminho_cache: str, store: str, manifesto: dict, algoritmos: Sequence[str]):
+    """Consulta as versões e obtém os .zip dos canais desatualizados (do armazenamento ou por download)."""
+    atualizados = _canais_desatualizados(obter_versoes_por_canal(CANAIS, PLATAFORMAS, caminho_cache))
+    chaves, canal_do_arquivo, urls = _planejar_artefatos(atualizados)
+    downloads = {}
+    digests_por_arquivo = {}
+    for caminho_zip, (versao_recente, plataforma) in chaves.items():
+        digests = recuperar_artefato(store, manifesto, versao_recente, plataforma, caminho_zip, algoritmos)
+        if digests:
+            log(f"{nome_zip(plataforma)} {versao_recente} já está no armazenamento local. Download dispensado.", style=Style.CYAN)
+            digests_por_arquivo[caminho_zip] = digests
+        else:
+            downloads[caminho_zip] = urls[caminho_zip]
+
+    if downloads:
+        log(f"Nova versão detectada ({', '.join(atualizados)}). Iniciando download de "
+            f"{len(downloads)} arquivo(s)...", style=Style.BLUE)
+        digests_por_arquivo.update(baixar_em_paralelo(downloads, algoritmos=algoritmos))
+    return atualizados, chaves, canal_do_arquivo, digests_por_arquivo
+
+
+async def _obter_versoes_e_artefatos_async(caminho_cache: str, store: str, manifesto: dict,
+                                           algoritmos: Sequence[str], paralelismo: int = DOWNLOAD_PARALELISMO):
+    """
+    Variante assíncrona de `_obter_versoes_e_artefatos`.
+
+    Cópias do armazenamento local e downloads de todos os canais e plataformas
+    correm ao mesmo tempo, limitados por um semáforo de `paralelismo`.
+    """
+    import asyncio
+
+    async with _cliente_async(paralelismo) as cliente:
+        versoes = await obter_versoes_por_canal_async(CANAIS, PLATAFORMAS, caminho_cache, cliente)
+        atualizados = _canais_desatualizados(versoes)
+        chaves, canal_do_arquivo, urls = _planejar_artefatos(atualizados)
+        semaforo = asyncio.Semaphore(max(1, paralelismo))
+
+        async def obter(caminho_zip: str) -> Dict[str, str]:
+            versao_recente, plataforma = chaves[caminho_zip]
+            async with semaforo:
+                digests = await asyncio.to_thread(recuperar_artefato, store, manifesto, versao_recente,
+                                                  plataforma, caminho_zip, algoritmos)
+                if digests:
+                    log(f"{nome_zip(plataforma)} {versao_recente} já está no armazenamento local. Download dispensado.", style=Style.CYAN)
+                    return digests
+                return await baixar_arquivo_com_progresso_async(urls[caminho_zip], caminho_zip,
+                                                                algoritmos=algoritmos, cliente=cliente)
+
+        if chaves:
+            log(f"Nova versão detectada ({', '.join(atualizados)}). Obtendo {len(chaves)} arquivo(s) "
+                f"com o motor assíncrono ({'httpx' if cliente else 'threads'})...", style=Style.BLUE)
+        resultados = await asyncio.gather(*(obter(caminho_zip) for caminho_zip in chaves))
+    return atualizados, chaves, canal_do_arquivo, dict(zip(chaves, resultados))
+
+
+def verificar_atualizacoes(assincrono: bool = False) -> str:
+    """
+    Executa um ciclo completo: consulta, download, versionamento e notificação.
+
+    Com `assincrono`, consulta e downloads usam o motor asyncio. Retorna
+    'atualizado', 'sem-alteracao' ou 'erro'. O ciclo e cada uma das suas fases
+    são medidos (veja `medir`), e o tempo total é registrado no log.
+    """
+    global _metricas_ciclo
+    with _metricas_lock:
+        _metricas_ciclo = []
+    with medir('ciclo', assincrono=assincrono) as metrica:
+        metrica["resultado"] = _executar_ciclo(assincrono)
+    log(f"Tempo total da execução: {metrica['duracao_s']:.2f}s.", style=Style.BLUE)
+    if METRICAS_PROMETHEUS:
+        try:
+            escrever_metricas_prometheus(METRICAS_PROMETHEUS, _metricas_ciclo, metrica["resultado"])
+        except OSError as e:
+            log(f"Falha ao gravar as métricas do Prometheus: {e}", style=Style.YELLOW)
+    return metrica["resultado"]
+
+
+def _gerar_patches_do_ciclo(store: str, manifesto: dict, chaves: dict, canal_do_arquivo: dict) -> None:
+    """Gera os patches da versão anterior (a do version.txt, ainda não atualizado) para a nova, sem interromper o ciclo."""
+    for caminho_zip, (versao, plataforma) in chaves.items():
+        canal = canal_do_arquivo[caminho_zip]
+        versao_anterior = ler_versao_salva(os.path.join(CHROMEDRIVER_PATH, diretorio_canal(canal), VERSION_FILE))
+        if not versao_anterior or versao_anterior == versao:
+            continue
+        try:
+            gerar_patch(store, manifesto, versao_anterior, versao, plataforma)
+        except (OSError, ValueError, KeyError, ImportError, subprocess.CalledProcessError) as e:
+            log(f"Não foi possível gerar o patch {versao_anterior} -> {versao} ({plataforma}): {e}", style=Style.YELLOW)
+
+
+def _concluir_publicacao(registros: Sequence[dict], commits: Dict[str, str], descricao: str) -> None:
+    """Registra no catálogo a tag de cada artefato publicado e o commit dela, e avisa que a atualização foi enviada."""
+    registrar_no_catalogo([dict(r, tag=tag_canal(r["canal"], r["versao"]),
+                                commit_git=commits.get(tag_canal(r["canal"], r["versao"]))) for r in registros])
+    notificar("ChromeDriver Atualizado", f"ChromeDriver {descricao} baixado e enviado para o GitHub.")
+
+
+def _salvar_push_pendente(arquivos: list, tags: list, mensagem: str, descricao: str, registros: list) -> None:
+    """Acrescenta ao marcador `.autodriver/push-pendente.json` um commit e tags que não chegaram ao remoto."""
+    caminho = os.path.join(diretorio_estado(), PUSH_PENDENTE_FILE)
+    pendente = ler_json(caminho) or {"arquivos": [], "tags": [], "descricoes": [], "registros": []}
+    pendente["arquivos"] += [a for a in arquivos if a not in pendente["arquivos"]]
+    pendente["tags"] += [t for t in tags if t not in pendente["tags"]]
+    pendente["descricoes"].append(descricao)
+    pendente["registros"] += registros
+    pendente["mensagem"] = mensagem
+    pendente["quando"] = datetime.now().isoformat(timespec='seconds')
+    salvar_json(caminho, pendente)
+
+
+def _reenviar_push_pendente() -> Optional[bool]:
+    """
+    Reenvia o commit e as tags de ciclos cujo push falhou, registrados em `.autodriver/push-pendente.json`.
+
+    Retorna None se não havia push pendente, True se o reenvio deu certo e False
+    se falhou de novo (o marcador fica para o próximo ciclo).
+    """
+    caminho = os.path.join(diretorio_estado(), PUSH_PENDENTE_FILE)
+    pendente = ler_json(caminho)
+    if not pendente:
+        return None
+    log(f"Reenviando o push pendente desde {pendente['quando']} ({', '.join(pendente['tags'])})...", style=Style.YELLOW)
+    commits = git_push_com_tag(CHROMEDRIVER_PATH, pendente["arquivos"], pendente["tags"], pendente["mensagem"],
+                               enviar_sempre=True)
+    if commits is None:
+        log("O push pendente falhou novamente. Uma nova tentativa será feita no próximo ciclo.", style=Style.RED)
+        return False
+    os.remove(caminho)
+    _concluir_publicacao(pendente["registros"], commits, ', '.join(pendente["descricoes"]))
+    log("Push pendente enviado com sucesso.", style=Style.GREEN)
+    return True
+
+
+def _executar_ciclo(assincrono: bool) -> str:
+    caminho_cache = caminho_cache_versoes()
+
+    try:
+        log("Iniciando verificação de versão do ChromeDriver...", style=Style.BLUE)
+        pendente = _reenviar_push_pendente()
+        store = diretorio_artefatos()
+        manifesto = ler_manifesto(store)
+        algoritmos = ('sha256',) + tuple(a for a in HASH_ALGORITMOS if a != 'sha256')
+        if assincrono:
+            import asyncio
+            atualizados, chaves, canal_do_arquivo, digests_por_arquivo = asyncio.run(
+                _obter_versoes_e_artefatos_async(caminho_cache, store, manifesto, algoritmos))
+        else:
+            atualizados, chaves, canal_do_arquivo, digests_por_arquivo = _obter_versoes_e_artefatos(
+                caminho_cache, store, manifesto, algoritmos)
+
+        if not atualizados:
+            log("Você já possui a última versão. Nenhuma ação necessária.", style=Style.YELLOW)
+            if pendente is None:
+                return 'sem-alteracao'
+            return 'atualizado' if pendente else 'erro'
+
+        for caminho_zip in chaves:
+            if armazenar_artefato(store, manifesto, *chaves[caminho_zip], caminho_zip, digests_por_arquivo[caminho_zip]):
+                log(f"Artefato {digests_por_arquivo[caminho_zip]['sha256'][:12]} adicionado ao armazenamento local.", style=Style.CYAN)
+        if PATCHES_FORMATO != 'nenhum':
+            _gerar_patches_do_ciclo(store, manifesto, chaves, canal_do_arquivo)
+        salvar_manifesto(store, manifesto)
+
+        arquivos = []
+        for caminho_zip in chaves:
+            digests = digests_por_arquivo[caminho_zip]
+            nome = os.path.relpath(caminho_zip, CHROMEDRIVER_PATH).replace(os.sep, '/')
+            for algoritmo, digest in digests.items():
+                log(f"{algoritmo.upper()} de '{nome}': {Style.BOLD}{digest}", style=Style.CYAN)
+            salvar_hash(caminho_zip, digests['sha256'])
+            arquivos.append(f"{nome}.sha256")
+            if ARMAZENAMENTO != 'release':
+                arquivos.append(nome)
+        if ARMAZENAMENTO == 'lfs':
+            arquivos.append(configurar_lfs(CHROMEDRIVER_PATH))
+
+        tags = []
+        for canal, (versao_recente, _) in atualizados.items():
+            arquivo_versao = '/'.join(filter(None, [diretorio_canal(canal), VERSION_FILE]))
+            salvar_versao(os.path.join(CHROMEDRIVER_PATH, arquivo_versao), versao_recente)
+            log(f"Arquivo '{arquivo_versao}' atualizado para '{Style.BOLD}{versao_recente}{Style.RESET}{Style.CYAN}'.", style=Style.CYAN)
+            arquivos.append(arquivo_versao)
+            tag = tag_canal(canal, versao_recente)
+            tags.append(tag)
+            if ARMAZENAMENTO == 'release':
+                zips = {c: digests_por_arquivo[c] for c in chaves if canal_do_arquivo[c] == canal}
+                arquivos.append(publicar_release_assets(canal, versao_recente, tag, zips))
+
+        if list(atualizados) == ['Stable']:
+            descricao = f"a versão {atualizados['Stable'][0]}"
+        else:
+            descricao = ', '.join(f"{canal} {versao}" for canal, (versao, _) in atualizados.items())
+        commit_message = f"Atualiza ChromeDriver para {descricao}"
+
+        commits = git_push_com_tag(
+            repo_path=CHROMEDRIVER_PATH,
+            files_to_add=arquivos,
+            tag=tags,
+            message=commit_message
+        )
+        baixado_em = datetime.now().isoformat(timespec='seconds')
+        registros = [{
+            "versao": versao, "plataforma": plataforma, "canal": canal_do_arquivo[caminho_zip],
+            "url": atualizados[canal_do_arquivo[caminho_zip]][1][plataforma],
+            "tamanho": manifesto["artefatos"][f"{versao}/{plataforma}"]["tamanho"],
+            "sha256": digests_por_arquivo[caminho_zip]['sha256'], "baixado_em": baixado_em,
+        } for caminho_zip, (versao, plataforma) in chaves.items()]
+
+        if commits is None:
+            # O version.txt já foi gravado: sem o marcador, o próximo ciclo diria
+            # 'sem-alteracao' e o commit e as tags nunca chegariam ao remoto.
+            registrar_no_catalogo(registros)
+            _salvar_push_pendente(arquivos, tags, commit_message, descricao, registros)
+            log("O envio ao repositório remoto falhou. O commit e as tags serão reenviados no próximo ciclo.",
+                style=Style.RED)
+            return 'erro'
+
+        _concluir_publicacao(registros, commits, descricao)
+        log("Processo concluído com sucesso!", style=Style.BOLD + Style.GREEN)
+        return 'atualizado'
+
+    except requests.exceptions.RequestException as e:
+        log(f"ERRO DE REDE: Não foi possível conectar à URL de download. Detalhes: {e}", style=Style.RED)
+    except (ValueError, KeyError) as e:
+        log(f"ERRO DE PROCESSAMENTO DE DADOS: Não foi possível processar os dados do JSON. Detalhes: {e}", style=Style.RED)
+    except Exception as e:
+        if _erro_de_rede_async(e):
+            log(f"ERRO DE REDE: Não foi possível conectar à URL de download. Detalhes: {e}", style=Style.RED)
+        else:
+            log(f"Ocorreu um erro inesperado: {e}", style=Style.RED)
+    return 'erro'
+
+
+def executar_daemon(intervalo: float, jitter: float, assincrono: bool = False) -> None:
+    """
+    Repete `verificar_atualizacoes` a cada `intervalo` ± `jitter` segundos até receber SIGINT/SIGTERM.
+
+    O processo continua vivo entre os ciclos, reaproveitando a sessão HTTP
+    (keep-alive) e o cache de versões em memória. A cada ciclo um heartbeat é
+    gravado em `.autodriver/heartbeat.json`.
+    """
+    import random
+    import signal
+
+    parar = threading.Event()
+
+    def encerrar(signum, frame):
+        log("Sinal de encerramento recebido. O daemon vai parar após o ciclo atual.", style=Style.YELLOW)
+        parar.set()
+
+    for nome in ('SIGINT', 'SIGTERM', 'SIGBREAK'):
+        if hasattr(signal, nome):
+            signal.signal(getattr(signal, nome), encerrar)
+
+    # Sem barras no log do serviço: o andamento vai para .autodriver/progresso.json.
+    definir_reporter_progresso(ReporterMetricas)
+    caminho_heartbeat = os.path.join(diretorio_estado(), HEARTBEAT_FILE)
+    log(f"Modo daemon iniciado (intervalo: {intervalo:.0f}s ± {jitter:.0f}s).", style=Style.BLUE)
+    ciclos = 0
+    while not parar.is_set():
+        resultado = verificar_atualizacoes(assincrono)
+        ciclos += 1
+        espera = max(1.0, intervalo + random.uniform(-jitter, jitter))
+        salvar_json(caminho_heartbeat, {
+            "pid": os.getpid(),
+            "ultima_verificacao": datetime.now().isoformat(timespec='seconds'),
+            "resultado": resultado,
+            "ciclos": ciclos,
+            "proxima_verificacao_em_s": round(espera),
+        })
+        parar.wait(espera)
+    log("Daemon encerrado.", style=Style.BLUE)
+
+
+def _interpretar_argumentos():
+    """Monta a linha de comando (subcomandos e opções) e interpreta `sys.argv`."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Verifica, baixa e versiona o ChromeDriver.")
+    parser.add_argument('--daemon', action='store_true',
+                        help="Mantém o processo ativo, verificando novas versões periodicamente.")
+    parser.add_argument('--intervalo', type=float, default=DAEMON_INTERVALO,
+                        help="Segundos entre verificações no modo daemon (padrão: %(default)s).")
+    parser.add_argument('--jitter', type=float, default=DAEMON_JITTER,
+                        help="Variação aleatória máxima, em segundos, do intervalo (padrão: %(default)s).")
+    parser.add_argument('--async', dest='assincrono', action='store_true',
+                        help="Usa o motor asyncio (httpx, se instalado) para consultas e downloads simultâneos.")
+    subparsers = parser.add_subparsers(dest='comando')
+    parser_serve = subparsers.add_parser('serve', help="Serve os artefatos por HTTP para os agentes da rede local.")
+    parser_serve.add_argument('--host', default=SERVE_HOST, help="Endereço de escuta (padrão: %(default)s).")
+    parser_serve.add_argument('--porta', type=int, default=SERVE_PORTA, help="Porta de escuta (padrão: %(default)s).")
+    parser_backfill = subparsers.add_parser('backfill', help="Baixa e versiona as versões históricas que ainda não têm tag.")
+    parser_backfill.add_argument('--lote', type=int, default=BACKFILL_LOTE,
+                                 help="Versões por commit/push (padrão: %(default)s).")
+    parser_backfill.add_argument('--paralelismo', type=int, default=DOWNLOAD_PARALELISMO,
+                                 help="Downloads simultâneos (padrão: %(default)s).")
+    parser_backfill.add_argument('--desde', help="Versão mínima a considerar (ex.: 120.0.6099.109).")
+    parser_resolver = subparsers.add_parser('resolver', help="Obtém o ChromeDriver compatível com o Chrome instalado.")
+    parser_resolver.add_argument('--versao-chrome', help="Versão do Chrome (padrão: detectada na máquina).")
+    parser_resolver.add_argument('--plataforma', help="Plataforma do driver (padrão: a desta máquina).")
+    parser_resolver.add_argument('--destino', help="Copia o .zip do driver para esta pasta.")
+    parser_resolver.add_argument('--materializar', metavar='PASTA',
+                                 help="Disponibiliza o driver já extraído nesta pasta (via cache de extração).")
+    parser_materializar = subparsers.add_parser('materializar', help="Disponibiliza o conteúdo de um .zip a partir do cache de extração.")
+    parser_materializar.add_argument('zip', help="Caminho do .zip (ex.: chromedriver-win64.zip).")
+    parser_materializar.add_argument('destino', help="Pasta onde os arquivos extraídos serão disponibilizados.")
+    parser_materializar.add_argument('--modo', choices=MODOS_MATERIALIZACAO,
+                                     help="Usa apenas este modo, sem tentar os demais (padrão: o primeiro que funcionar).")
+    parser_patch = subparsers.add_parser('aplicar-patch', help="Reconstrói o executável da nova versão a partir do anterior e de um patch.")
+    parser_patch.add_argument('origem', help="Executável da versão anterior.")
+    parser_patch.add_argument('patch', help="Arquivo de patch (listado em 'patches' no manifesto).")
+    parser_patch.add_argument('destino', help="Onde gravar o executável da nova versão.")
+    parser_patch.add_argument('--formato', choices=tuple(_EXTENSOES_PATCH), default='zstd',
+                              help="Formato do patch (padrão: %(default)s).")
+    parser_patch.add_argument('--sha256', help="SHA-256 esperado do resultado ('sha256_destino' no manifesto).")
+    parser_catalogo = subparsers.add_parser('catalogo', help="Consulta o catálogo local de versões.")
+    consulta_catalogo = parser_catalogo.add_mutually_exclusive_group(required=True)
+    consulta_catalogo.add_argument('--milestone', type=int, help="Versão mais recente deste milestone (ex.: 126).")
+    consulta_catalogo.add_argument('--sha256', help="Versões, commits e tags que contêm o .zip com este digest.")
+    parser_catalogo.add_argument('--plataforma', default=PLATAFORMAS[0],
+                                 help="Plataforma usada com --milestone (padrão: %(default)s).")
+    return parser.parse_args()
+
+
+def main():
+    """Função principal: interpreta os argumentos e executa uma verificação ou o modo daemon."""
+    inicializar_estilos()
+    if len(sys.argv) > 1:
+        args = _interpretar_argumentos()
+    else:
+        # Sem argumentos (a execução agendada comum), o argparse nem é carregado.
+        from types import SimpleNamespace
+        args = SimpleNamespace(comando=None, daemon=False, assincrono=False)
+
+    if args.comando == 'aplicar-patch':
+        # Usado nos agentes, que não precisam do repositório configurado.
+        try:
+            aplicar_patch(args.origem, args.patch, args.destino, args.formato, args.sha256)
+        except (OSError, ValueError, ImportError, subprocess.CalledProcessError) as e:
+            log(f"ERRO ao aplicar o patch: {e}", style=Style.RED)
+            sys.exit(1)
+        log(f"'{args.destino}' reconstruído a partir do patch.", style=Style.GREEN)
+        return
+    if PATCHES_FORMATO_INVALIDO:
+        log(f"PATCHES_FORMATO='{PATCHES_FORMATO_INVALIDO}' é inválido (use zstd, bsdiff ou nenhum). "
+            f"Os patches entre versões estão desativados.", style=Style.YELLOW)
+    if not CHROMEDRIVER_PATH:
+        log("ERRO: A variável de ambiente 'CHROMEDRIVER_PATH' não está definida.", style=Style.RED)
+        log("Por favor, crie um arquivo .env e adicione a linha: CHROMEDRIVER_PATH=/caminho/para/seu/repositorio", style=Style.YELLOW)
+        return
+    if ARMAZENAMENTO == 'release' and not RELEASE_ASSETS_PATH:
+        log("ERRO: CHROMEDRIVER_ARMAZENAMENTO=release exige a variável 'RELEASE_ASSETS_PATH'.", style=Style.RED)
+        return
+
+    os.makedirs(CHROMEDRIVER_PATH, exist_ok=True)
+    if args.comando == 'serve':
+        servir_espelho(args.host, args.porta)
+    elif args.comando == 'backfill':
+        try:
+            executar_backfill(args.lote, args.paralelismo, args.desde)
+        except (requests.exceptions.RequestException, subprocess.CalledProcessError, ValueError, KeyError) as e:
+            log(f"ERRO no backfill: {e}", style=Style.RED)
+            log("Execute o backfill novamente para continuar de onde parou.", style=Style.YELLOW)
+    elif args.comando == 'resolver':
+        try:
+            versao, caminho = resolver_driver_instalado(args.versao_chrome, args.plataforma)
+        except (requests.exceptions.RequestException, subprocess.SubprocessError, OSError, ValueError, KeyError) as e:
+            log(f"ERRO ao resolver o ChromeDriver: {e}", style=Style.RED)
+            sys.exit(1)
+        if args.materializar:
+            modo = materializar(extrair_em_cache(caminho), args.materializar)
+            log(f"ChromeDriver {versao} disponível em '{args.materializar}' ({modo}).", style=Style.GREEN)
+        if args.destino:
+            os.makedirs(args.destino, exist_ok=True)
+            caminho = shutil.copy(caminho, os.path.join(args.destino, nome_zip(args.plataforma or plataforma_local())))
+        print(caminho)
+    elif args.comando == 'materializar':
+        try:
+            modo = materializar(extrair_em_cache(args.zip), args.destino,
+                                [args.modo] if args.modo else MODOS_MATERIALIZACAO)
+        except (OSError, ValueError) as e:
+            log(f"ERRO ao materializar '{args.zip}': {e}", style=Style.RED)
+            sys.exit(1)
+        log(f"Conteúdo de '{os.path.basename(args.zip)}' disponível em '{args.destino}' ({modo}).", style=Style.GREEN)
+    elif args.comando == 'catalogo':
+        if args.milestone is not None:
+            registro = consultar_ultima_do_milestone(args.milestone, args.plataforma)
+            registros = [registro] if registro else []
+        else:
+            registros = consultar_por_sha256(args.sha256)
+        if not registros:
+            log("Nenhuma versão encontrada no catálogo.", style=Style.YELLOW)
+        for registro in registros:
+            print(json.dumps(registro, ensure_ascii=False))
+    elif args.daemon:
+        executar_daemon(args.intervalo, args.jitter, args.assincrono)
+    else:
+        verificar_atualizacoes(args.assincrono)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,323 @@
+"""
+Benchmark dos caminhos críticos do atualiza_chromedriver.
+
+Este script:
+1.  Sobe um servidor HTTP local (o mesmo do subcomando `serve`) com um JSON de
+    versões falso e .zip sintéticos do tamanho pedido.
+2.  Cria um repositório Git "remoto" local (bare) e um clone de trabalho.
+3.  Mede cada fase do fluxo principal: consulta (200 e 304), download, hash,
+    gravação dos arquivos de versão, commit + push, além do ciclo completo.
+4.  Varre parâmetros de desempenho (CHUNK_SIZE, número de segmentos e
+    HASH_BUFFER_SIZE) medindo apenas a fase afetada. HASH_BUFFER_SIZE é medido
+    na releitura de arquivos em disco ('releitura_hash': retomada, hash final do
+    download segmentado), não na fase 'hash', que no Python 3.11+ usa
+    hashlib.file_digest.
+5.  Compara tempo e pico de memória (tracemalloc) da leitura do histórico de
+    versões com `json.load` e com a leitura incremental (`iterar_itens_json`).
+6.  Emite o resultado em JSON, para comparar execuções entre versões.
+
+Nada sai da máquina: todo o tráfego vai para 127.0.0.1 e o push vai para uma
+pasta temporária.
+
+Uso:
+    python benchmark_chromedriver.py [--tamanho-mb 8] [--repeticoes 3] [--saida resultado.json]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import zipfile
+import argparse
+import platform
+import tempfile
+import threading
+import statistics
+import tracemalloc
+import subprocess
+from contextlib import redirect_stdout
+from datetime import datetime
+from http.server import ThreadingHTTPServer
+
+import atualiza_chromedriver as ac
+
+PLATAFORMA = 'win64'
+
+
+# === AMBIENTE DE TESTE ===
+def criar_zip_sintetico(caminho: str, tamanho: int, semente: int) -> None:
+    """Cria um .zip (sem compressão) com um 'chromedriver' de `tamanho` bytes pseudoaleatórios."""
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    gerador = random.Random(semente)
+    with zipfile.ZipFile(caminho, 'w', compression=zipfile.ZIP_STORED) as z:
+        z.writestr(f'chromedriver-{PLATAFORMA}/chromedriver.exe', gerador.randbytes(tamanho))
+
+
+class AmbienteBenchmark:
+    """Servidor HTTP local, remoto Git bare e clone de trabalho em uma pasta temporária."""
+
+    def __init__(self, tamanho: int):
+        self.tamanho = tamanho
+        self.pasta = tempfile.mkdtemp(prefix='autodriver-bench-')
+        self.raiz_http = os.path.join(self.pasta, 'http')
+        self.remoto = os.path.join(self.pasta, 'remoto.git')
+        self.repo = os.path.join(self.pasta, 'repo')
+        self.versoes_criadas = 0
+
+        os.makedirs(os.path.join(self.raiz_http, ac.ESTADO_DIR))
+        self.servidor = ThreadingHTTPServer(('127.0.0.1', 0), ac._criar_manipulador(self.raiz_http))
+        self.url_base = f"http://127.0.0.1:{self.servidor.server_address[1]}"
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+
+        subprocess.run(['git', 'init', '-q', '--bare', self.remoto], check=True)
+        subprocess.run(['git', 'clone', '-q', self.remoto, self.repo], check=True, capture_output=True)
+        for chave, valor in (('user.name', 'benchmark'), ('user.email', 'benchmark@localhost')):
+            subprocess.run(['git', 'config', chave, valor], cwd=self.repo, check=True)
+        subprocess.run(['git', 'commit', '-q', '--allow-empty', '-m', 'Inicial'], cwd=self.repo, check=True)
+        subprocess.run(['git', 'push', '-q', 'origin', 'HEAD'], cwd=self.repo, check=True, capture_output=True)
+
+    def publicar_nova_versao(self) -> tuple:
+        """Gera um .zip inédito, publica-o como a versão estável no JSON e retorna (versão, url)."""
+        self.versoes_criadas += 1
+        versao = f"200.0.{self.versoes_criadas}.0"
+        relativo = f"{versao}/{PLATAFORMA}/{ac.nome_zip(PLATAFORMA)}"
+        criar_zip_sintetico(os.path.join(self.raiz_http, *relativo.split('/')), self.tamanho, self.versoes_criadas)
+        url = f"{self.url_base}/{relativo}"
+        documento = {
+            "timestamp": datetime.now().isoformat(),
+            "channels": {
+                "Stable": {
+                    "channel": "Stable",
+                    "version": versao,
+                    "revision": str(self.versoes_criadas),
+                    "downloads": {"chromedriver": [{"platform": PLATAFORMA, "url": url}]},
+                },
+            },
+        }
+        caminho_json = os.path.join(self.raiz_http, ac.ESTADO_DIR, ac.VERSOES_ESPELHO_FILE)
+        with open(caminho_json, 'w', encoding='utf-8') as f:
+            json.dump(documento, f)
+        return versao, url
+
+    def configurar_modulo(self) -> None:
+        """Aponta o atualiza_chromedriver para o servidor e o repositório locais."""
+        ac.JSON_URL = f"{self.url_base}/{ac.VERSOES_ESPELHO_FILE}"
+        ac.CHROMEDRIVER_PATH = self.repo
+        ac.CANAIS = ('Stable',)
+        ac.PLATAFORMAS = (PLATAFORMA,)
+        ac.ARMAZENAMENTO = 'git'
+        # Notificações de desktop não fazem parte do que está sendo medido.
+        ac.notificar = lambda titulo, mensagem: None
+
+    def encerrar(self) -> None:
+        import shutil
+
+        self.servidor.shutdown()
+        self.servidor.server_close()
+        shutil.rmtree(self.pasta, ignore_errors=True)
+
+
+# === MEDIÇÕES ===
+def cronometrar(funcao, *args, **kwargs) -> float:
+    inicio = time.perf_counter()
+    funcao(*args, **kwargs)
+    return time.perf_counter() - inicio
+
+
+def resumir(tempos: list, tamanho: int = 0) -> dict:
+    """Estatísticas de uma lista de durações (em segundos) e, com `tamanho`, a vazão em MB/s."""
+    resumo = {
+        "min_s": round(min(tempos), 6),
+        "mediana_s": round(statistics.median(tempos), 6),
+        "max_s": round(max(tempos), 6),
+        "amostras": len(tempos),
+    }
+    if tamanho:
+        resumo["mb_s_mediana"] = round(tamanho / (1024 * 1024) / max(statistics.median(tempos), 1e-9), 2)
+    return resumo
+
+
+def medir_fases(ambiente: AmbienteBenchmark, repeticoes: int) -> dict:
+    """Executa as fases do fluxo principal em sequência, uma nova versão por repetição."""
+    caminho_cache = ac.caminho_cache_versoes(ambiente.repo)
+    caminho_zip = os.path.join(ambiente.repo, ac.nome_zip(PLATAFORMA))
+    fases = {fase: [] for fase in ('consulta', 'consulta_304', 'download', 'hash',
+                                   'gravacao_versao', 'git_commit_push', 'ciclo_completo')}
+    tamanho_zip = 0
+
+    for _ in range(repeticoes):
+        versao, url = ambiente.publicar_nova_versao()
+        fases['consulta'].append(cronometrar(ac.consultar_canais, caminho_cache))
+        fases['consulta_304'].append(cronometrar(ac.consultar_canais, caminho_cache))
+        fases['download'].append(cronometrar(ac.baixar_arquivo_segmentado, url, caminho_zip,
+                                             segmentos=1, exibir_progresso=False))
+        tamanho_zip = os.path.getsize(caminho_zip)
+        inicio = time.perf_counter()
+        sha256 = ac.calcular_sha256(caminho_zip)
+        fases['hash'].append(time.perf_counter() - inicio)
+        inicio = time.perf_counter()
+        ac.salvar_hash(caminho_zip, sha256)
+        ac.salvar_versao(os.path.join(ambiente.repo, ac.VERSION_FILE), versao)
+        fases['gravacao_versao'].append(time.perf_counter() - inicio)
+        arquivos = [ac.nome_zip(PLATAFORMA), f"{ac.nome_zip(PLATAFORMA)}.sha256", ac.VERSION_FILE]
+        fases['git_commit_push'].append(cronometrar(ac.git_push_com_tag, ambiente.repo, arquivos,
+                                                    ac.tag_canal('Stable', versao), f"Benchmark {versao}"))
+
+        ambiente.publicar_nova_versao()
+        fases['ciclo_completo'].append(cronometrar(ac.verificar_atualizacoes))
+
+    return {fase: resumir(tempos, tamanho_zip if fase in ('download', 'hash') else 0)
+            for fase, tempos in fases.items()}
+
+
+def varrer_parametros(ambiente: AmbienteBenchmark, repeticoes: int, chunk_sizes: list,
+                      segmentos: list, hash_buffers: list) -> dict:
+    """Varre um parâmetro por vez (os demais ficam no padrão), medindo só a fase que ele afeta."""
+    _, url = ambiente.publicar_nova_versao()
+    destino = os.path.join(ambiente.pasta, 'varredura.zip')
+    originais = (ac.CHUNK_SIZE, ac.HASH_BUFFER_SIZE)
+    varreduras = {"CHUNK_SIZE": [], "DOWNLOAD_SEGMENTOS": [], "HASH_BUFFER_SIZE": []}
+
+    try:
+        for valor in chunk_sizes:
+            ac.CHUNK_SIZE = valor
+            tempos = [cronometrar(ac.baixar_arquivo_segmentado, url, destino, segmentos=1, exibir_progresso=False)
+                      for _ in range(repeticoes)]
+            varreduras["CHUNK_SIZE"].append({"valor": valor, "fase": "download", **resumir(tempos, ambiente.tamanho)})
+        ac.CHUNK_SIZE = originais[0]
+
+        for valor in segmentos:
+            tempos = [cronometrar(ac.baixar_arquivo_segmentado, url, destino, segmentos=valor, exibir_progresso=False)
+                      for _ in range(repeticoes)]
+            varreduras["DOWNLOAD_SEGMENTOS"].append({"valor": valor, "fase": "download", **resumir(tempos, ambiente.tamanho)})
+
+        # HASH_BUFFER_SIZE só vale para a releitura de arquivos em disco (`_atualizar_hashes`):
+        # retomada de download, hash final do download segmentado e digests faltantes no
+        # armazenamento. A fase 'hash' do fluxo principal usa `calcular_sha256`, que no
+        # Python 3.11+ delega ao hashlib.file_digest e ignora esse parâmetro.
+        def releitura_hash():
+            with open(destino, 'rb') as f:
+                ac._atualizar_hashes(f, [hashlib.sha256()])
+
+        for valor in hash_buffers:
+            ac.HASH_BUFFER_SIZE = valor
+            tempos = [cronometrar(releitura_hash) for _ in range(repeticoes)]
+            varreduras["HASH_BUFFER_SIZE"].append({"valor": valor, "fase": "releitura_hash",
+                                                   **resumir(tempos, ambiente.tamanho)})
+    finally:
+        ac.CHUNK_SIZE, ac.HASH_BUFFER_SIZE = originais
+    return varreduras
+
+
+def criar_historico_sintetico(caminho: str, versoes: int) -> None:
+    """Grava um `known-good-versions-with-downloads.json` com `versoes` versões e downloads de todas as plataformas."""
+    plataformas = ('linux64', 'mac-arm64', 'mac-x64', 'win32', 'win64')
+    itens = []
+    for i in range(versoes):
+        versao = f"120.0.{i // 100}.{i % 100}"
+        downloads = {produto: [{"platform": p, "url": f"https://example.invalid/{versao}/{p}/{produto}-{p}.zip"}
+                               for p in plataformas]
+                     for produto in ('chrome', 'chromedriver', 'chrome-headless-shell')}
+        itens.append({"version": versao, "revision": str(1000000 + i), "downloads": downloads})
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump({"timestamp": datetime.now().isoformat(), "versions": itens}, f)
+
+
+def medir_leitura_json(pasta: str, versoes: list, repeticoes: int) -> list:
+    """Tempo e pico de memória para extrair {versão: url win64} do histórico, por tamanho e por método."""
+    def com_json_load(caminho):
+        with open(caminho, 'rb') as f:
+            dados = json.load(f)
+        return {item["version"]: item["downloads"]["chromedriver"][-1]["url"] for item in dados["versions"]}
+
+    def com_leitura_incremental(caminho):
+        with open(caminho, 'rb') as f:
+            blocos = iter(lambda: f.read(ac.JSON_CHUNK_SIZE), b'')
+            return {item["version"]: item["downloads"]["chromedriver"][-1]["url"]
+                    for item in ac.iterar_itens_json(blocos, "versions")}
+
+    leitor_original = ac.JSON_LEITOR
+    metodos = {"json.load": (com_json_load, 'nativo'),
+               "incremental": (com_leitura_incremental, 'nativo')}
+    if ac._importar_ijson() is not None:
+        metodos["incremental_ijson"] = (com_leitura_incremental, 'ijson')
+
+    resultados = []
+    try:
+        for quantidade in versoes:
+            caminho = os.path.join(pasta, f"historico-{quantidade}.json")
+            criar_historico_sintetico(caminho, quantidade)
+            for nome, (funcao, leitor) in metodos.items():
+                ac.JSON_LEITOR = leitor
+                tempos, picos = [], []
+                for _ in range(repeticoes):
+                    tracemalloc.start()
+                    tempos.append(cronometrar(funcao, caminho))
+                    picos.append(tracemalloc.get_traced_memory()[1])
+                    tracemalloc.stop()
+                resultados.append({"versoes": quantidade, "bytes": os.path.getsize(caminho), "metodo": nome,
+                                   "pico_memoria_mb": round(max(picos) / (1024 * 1024), 2), **resumir(tempos)})
+    finally:
+        ac.JSON_LEITOR = leitor_original
+    return resultados
+
+
+def lista_de_inteiros(texto: str) -> list:
+    return [int(valor) for valor in texto.split(',') if valor.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Mede as fases do atualiza_chromedriver com servidor e remoto locais.")
+    parser.add_argument('--tamanho-mb', type=float, default=8, help="Tamanho do .zip sintético (padrão: %(default)s).")
+    parser.add_argument('--repeticoes', type=int, default=3, help="Repetições de cada medição (padrão: %(default)s).")
+    parser.add_argument('--chunk-sizes', type=lista_de_inteiros, default='65536,262144,1048576,4194304',
+                        help="Valores de CHUNK_SIZE a varrer (padrão: %(default)s).")
+    parser.add_argument('--segmentos', type=lista_de_inteiros, default='1,2,4,8',
+                        help="Números de segmentos a varrer (padrão: %(default)s).")
+    parser.add_argument('--hash-buffers', type=lista_de_inteiros, default='65536,262144,1048576,4194304',
+                        help="Valores de HASH_BUFFER_SIZE a varrer na releitura de arquivos (padrão: %(default)s).")
+    parser.add_argument('--versoes-json', type=lista_de_inteiros, default='1000,10000',
+                        help="Tamanhos (em versões) do histórico sintético para a leitura de JSON (padrão: %(default)s).")
+    parser.add_argument('--sem-varredura', action='store_true', help="Mede apenas as fases do fluxo principal.")
+    parser.add_argument('--saida', help="Grava o JSON neste arquivo em vez de imprimi-lo.")
+    parser.add_argument('--verbose', action='store_true', help="Mostra os logs do atualiza_chromedriver.")
+    args = parser.parse_args()
+
+    ac.inicializar_estilos()
+    ambiente = AmbienteBenchmark(int(args.tamanho_mb * 1024 * 1024))
+    ambiente.configurar_modulo()
+    resultado = {
+        "data": datetime.now().isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "sistema": platform.platform(),
+        "parametros": {
+            "tamanho_zip_bytes": ambiente.tamanho,
+            "repeticoes": args.repeticoes,
+            "CHUNK_SIZE": ac.CHUNK_SIZE,
+            "HASH_BUFFER_SIZE": ac.HASH_BUFFER_SIZE,
+            "GIT_BACKEND": ac.GIT_BACKEND,
+        },
+    }
+    try:
+        with redirect_stdout(sys.stdout if args.verbose else open(os.devnull, 'w')):
+            resultado["fases"] = medir_fases(ambiente, args.repeticoes)
+            if not args.sem_varredura:
+                resultado["varreduras"] = varrer_parametros(ambiente, args.repeticoes, args.chunk_sizes,
+                                                            args.segmentos, args.hash_buffers)
+            resultado["leitura_json"] = medir_leitura_json(ambiente.pasta, args.versoes_json, args.repeticoes)
+    finally:
+        ambiente.encerrar()
+
+    saida = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(saida + '\n')
+    else:
+        print(saida)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
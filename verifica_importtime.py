@@ -0,0 +1,158 @@
+"""
+Verificação de regressão do tempo de inicialização do atualiza_chromedriver.
+
+Executa o script com `python -X importtime` em processos novos e falha (código
+de saída 1) se:
+1.  O menor tempo acumulado de importação passar do orçamento.
+2.  O menor tempo de uma execução sem novidade (importação + `main()` sem
+    argumentos, com o JSON de versões respondendo 304 pelo servidor local do
+    benchmark) passar do orçamento de execução.
+3.  Algum módulo pesado que o caminho "já atualizado" não usa for carregado,
+    seja na importação ou durante essa execução (plyer, colorama, asyncio,
+    argparse, sqlite3, etc. devem ser importados sob demanda).
+
+Uso:
+    python verifica_importtime.py [--orcamento-ms 250] [--orcamento-execucao-ms 400] [--repeticoes 5]
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+MODULO = 'atualiza_chromedriver'
+ORCAMENTO_MS = float(os.getenv('IMPORTTIME_ORCAMENTO_MS', '250'))
+ORCAMENTO_EXECUCAO_MS = float(os.getenv('IMPORTTIME_ORCAMENTO_EXECUCAO_MS', '400'))
+MODULOS_PROIBIDOS = (
+    'plyer', 'colorama', 'asyncio', 'concurrent.futures', 'argparse',
+    'http.server', 'httpx', 'dulwich', 'ijson', 'sqlite3',
+)
+# Importa o script e executa `main()` sem argumentos, como uma execução agendada.
+CODIGO_EXECUCAO = (
+    "import sys, json, time; antes = set(sys.modules); inicio = time.perf_counter(); "
+    f"import {MODULO} as m; m.JSON_URL = sys.argv[1]; sys.argv = ['{MODULO}.py']; m.main(); "
+    "print(json.dumps({'ms': (time.perf_counter() - inicio) * 1000, "
+    "'modulos': sorted(set(sys.modules) - antes)}))"
+)
+
+
+def _interpretar_importtime(saida: str) -> list:
+    """Linhas do `-X importtime` como (acumulado em µs, próprio em µs, módulo, nível), na ordem da saída."""
+    linhas = []
+    for linha in saida.splitlines():
+        if not linha.startswith('import time:') or 'cumulative' in linha:
+            continue
+        proprio, acumulado, campo_nome = linha[len('import time:'):].split('|')
+        nivel = (len(campo_nome) - len(campo_nome.lstrip()) - 1) // 2
+        linhas.append((int(acumulado), int(proprio), campo_nome.strip(), nivel))
+    return linhas
+
+
+def medir_importacao() -> tuple:
+    """Importa o módulo em um processo novo e retorna (tempo acumulado em ms, módulos carregados, linhas do importtime)."""
+    codigo = (
+        "import sys, json; antes = set(sys.modules); "
+        f"import {MODULO}; "
+        "print(json.dumps(sorted(set(sys.modules) - antes)))"
+    )
+    resultado = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo],
+                               cwd=os.path.dirname(os.path.abspath(__file__)),
+                               capture_output=True, text=True, check=True)
+    linhas = _interpretar_importtime(resultado.stderr)
+    total_us = next((acumulado for acumulado, _, nome, _ in linhas if nome == MODULO), None)
+    if total_us is None:
+        raise RuntimeError(f"O módulo '{MODULO}' não apareceu na saída do -X importtime.")
+    return total_us / 1000, json.loads(resultado.stdout.strip().splitlines()[-1]), linhas
+
+
+def executar_sem_novidade(url_json: str, repo: str) -> tuple:
+    """
+    Executa `main()` em um processo novo contra o servidor local e retorna
+    (tempo total em ms, módulos carregados, importações feitas durante o `main()`, saída).
+    """
+    ambiente = dict(os.environ, CHROMEDRIVER_PATH=repo, CHROMEDRIVER_CANAIS='Stable',
+                    CHROMEDRIVER_PLATAFORMAS='win64', CHROMEDRIVER_ARMAZENAMENTO='git')
+    for variavel in ('METRICAS_JSONL', 'METRICAS_PROMETHEUS'):
+        ambiente.pop(variavel, None)
+    resultado = subprocess.run([sys.executable, '-X', 'importtime', '-c', CODIGO_EXECUCAO, url_json],
+                               cwd=os.path.dirname(os.path.abspath(__file__)), env=ambiente,
+                               capture_output=True, text=True, check=True)
+    linhas = _interpretar_importtime(resultado.stderr)
+    indice = next(i for i, linha in enumerate(linhas) if linha[2] == MODULO)
+    sob_demanda = [linha for linha in linhas[indice + 1:] if linha[3] == 0]
+    dados = json.loads(resultado.stdout.strip().splitlines()[-1])
+    return dados["ms"], dados["modulos"], sob_demanda, resultado.stdout
+
+
+def medir_execucoes_sem_novidade(repeticoes: int) -> list:
+    """Sobe o servidor do benchmark com a versão já salva no repositório e mede `repeticoes` execuções 304."""
+    import benchmark_chromedriver as bench
+
+    ambiente = bench.AmbienteBenchmark(tamanho=1024)
+    try:
+        versao, _ = ambiente.publicar_nova_versao()
+        with open(os.path.join(ambiente.repo, 'version.txt'), 'w', encoding='utf-8') as f:
+            f.write(versao)
+        url_json = f"{ambiente.url_base}/{bench.ac.VERSOES_ESPELHO_FILE}"
+        executar_sem_novidade(url_json, ambiente.repo)  # 200: preenche o cache de versões
+        medicoes = [executar_sem_novidade(url_json, ambiente.repo) for _ in range(repeticoes)]
+    finally:
+        ambiente.encerrar()
+    if not all('(304)' in saida for *_, saida in medicoes):
+        raise RuntimeError("O servidor local não respondeu 304; a execução medida não foi a sem novidade.")
+    return medicoes
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Verifica o tempo de inicialização do atualiza_chromedriver.")
+    parser.add_argument('--orcamento-ms', type=float, default=ORCAMENTO_MS,
+                        help="Tempo máximo de importação, em ms (padrão: %(default)s).")
+    parser.add_argument('--orcamento-execucao-ms', type=float, default=ORCAMENTO_EXECUCAO_MS,
+                        help="Tempo máximo de uma execução sem novidade, em ms (padrão: %(default)s).")
+    parser.add_argument('--repeticoes', type=int, default=5,
+                        help="Quantas medições fazer; vale o menor tempo (padrão: %(default)s).")
+    args = parser.parse_args()
+    repeticoes = max(1, args.repeticoes)
+
+    medicoes = [medir_importacao() for _ in range(repeticoes)]
+    melhor_ms, carregados, linhas = min(medicoes, key=lambda medicao: medicao[0])
+
+    print(f"Tempo de importação de '{MODULO}': {melhor_ms:.1f}ms "
+          f"(melhor de {len(medicoes)}; orçamento: {args.orcamento_ms:.0f}ms)")
+    print("Importações diretas mais pesadas:")
+    diretas = [linha for linha in linhas if linha[3] == 1]  # um nível abaixo do módulo
+    for acumulado, _, nome, _ in sorted(diretas, reverse=True)[:8]:
+        print(f"  {acumulado / 1000:8.1f}ms  {nome}")
+
+    execucoes = medir_execucoes_sem_novidade(repeticoes)
+    execucao_ms, carregados_execucao, sob_demanda, _ = min(execucoes, key=lambda medicao: medicao[0])
+    print(f"Execução sem novidade (304): {execucao_ms:.1f}ms "
+          f"(melhor de {len(execucoes)}; orçamento: {args.orcamento_execucao_ms:.0f}ms)")
+    if sob_demanda:
+        print("Importações feitas durante o main():")
+        for acumulado, _, nome, _ in sorted(sob_demanda, reverse=True)[:8]:
+            print(f"  {acumulado / 1000:8.1f}ms  {nome}")
+
+    falhas = []
+    if melhor_ms > args.orcamento_ms:
+        falhas.append(f"tempo de importação acima do orçamento ({melhor_ms:.1f}ms > {args.orcamento_ms:.0f}ms)")
+    if execucao_ms > args.orcamento_execucao_ms:
+        falhas.append(f"execução sem novidade acima do orçamento "
+                      f"({execucao_ms:.1f}ms > {args.orcamento_execucao_ms:.0f}ms)")
+    proibidos = [nome for nome in MODULOS_PROIBIDOS if nome in carregados]
+    if proibidos:
+        falhas.append(f"módulos que deveriam ser carregados sob demanda: {', '.join(proibidos)}")
+    proibidos = [nome for nome in MODULOS_PROIBIDOS if nome in carregados_execucao]
+    if proibidos:
+        falhas.append(f"módulos carregados na execução sem novidade: {', '.join(proibidos)}")
+
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    if not falhas:
+        print("OK")
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
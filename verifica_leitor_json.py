@@ -0,0 +1,80 @@
+"""
+Verificação da leitura incremental de JSON do atualiza_chromedriver.
+
+Divide documentos JSON em blocos em todas as posições possíveis (inclusive no
+meio de números, strings com escapes e caracteres UTF-8 de vários bytes) e
+confere se `iterar_itens_json` e `iterar_pares_json` produzem o mesmo resultado
+que `json.loads`. Roda com o leitor nativo e, se o pacote estiver instalado,
+com o `ijson`. Sai com código 1 se algum caso falhar.
+
+Uso:
+    python verifica_leitor_json.py
+"""
+
+import sys
+import json
+
+import atualiza_chromedriver as ac
+
+# (documento, chave, 'itens' para um array ou 'pares' para um objeto)
+CASOS = (
+    ('{"versions": [12.5, 3]}', 'versions', 'itens'),
+    ('{"versions": [12e3, -4, 0.5E-2, 7]}', 'versions', 'itens'),
+    ('{"versions":[1,22,333,true,false,null]}', 'versions', 'itens'),
+    ('{"timestamp": "x", "n": 12345, "versions": [{"version": "1.0", "url": "u\\u00e9\\"ção"}], "fim": [1]}',
+     'versions', 'itens'),
+    ('{ "outro" : {"a": [1, 2.5]} , "versions" : [ ] }', 'versions', 'itens'),
+    ('{"a": 1}', 'versions', 'itens'),
+    ('{"builds": {"1.0.1": {"version": "1.0.1.5"}, "1.0.2": 2.25}}', 'builds', 'pares'),
+    ('{"x": -1.5e2, "builds": {}}', 'builds', 'pares'),
+)
+
+
+def esperado(documento: str, chave: str, tipo: str) -> list:
+    valor = json.loads(documento).get(chave, [] if tipo == 'itens' else {})
+    return valor if tipo == 'itens' else list(valor.items())
+
+
+def ler(dados: bytes, cortes: tuple, chave: str, tipo: str) -> list:
+    limites = (0,) + cortes + (len(dados),)
+    blocos = [dados[inicio:fim] for inicio, fim in zip(limites, limites[1:])]
+    funcao = ac.iterar_itens_json if tipo == 'itens' else ac.iterar_pares_json
+    return list(funcao(blocos, chave))
+
+
+def verificar(leitor: str) -> list:
+    ac.JSON_LEITOR = leitor
+    falhas = []
+    for documento, chave, tipo in CASOS:
+        dados = documento.encode('utf-8')
+        alvo = esperado(documento, chave, tipo)
+        # Um corte em cada posição, dois cortes consecutivos e blocos de 1 byte.
+        particoes = [(i,) for i in range(1, len(dados))]
+        particoes += [(i, i + 1) for i in range(1, len(dados) - 1)]
+        particoes.append(tuple(range(1, len(dados))))
+        for cortes in particoes:
+            try:
+                obtido = ler(dados, cortes, chave, tipo)
+            except ValueError as e:
+                obtido = f"erro: {e}"
+            if obtido != alvo:
+                falhas.append(f"[{leitor}] {documento!r} cortado em {cortes[:4]}: {obtido!r} != {alvo!r}")
+                break
+    return falhas
+
+
+def main() -> int:
+    ac.inicializar_estilos()
+    leitores = ['nativo'] + (['ijson'] if ac._importar_ijson() is not None else [])
+    falhas = []
+    for leitor in leitores:
+        falhas += verificar(leitor)
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    if not falhas:
+        print(f"OK ({len(CASOS)} documentos; leitores: {', '.join(leitores)})")
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())